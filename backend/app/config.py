@@ -1,40 +1,56 @@
-import os
+from functools import lru_cache
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import List
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-load_dotenv()
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore',
+        case_sensitive=True,
+        frozen=True,
+    )
 
-class Settings:
-    API_HOST: str = os.getenv('API_HOST', '0.0.0.0')
-    API_PORT: int = int(os.getenv('API_PORT', '8000'))
-    DEBUG: bool = os.getenv('DEBUG', 'False').lower() == 'true'
+    API_HOST: str = '0.0.0.0'
+    API_PORT: int = 8000
+    DEBUG: bool = False
+    CORS_ORIGINS: List[str] = ['http://localhost:3000']
 
-    STORAGE_PATH: Path = Path(os.getenv('STORAGE_PATH', './storage'))
-    STORAGE_TYPE: str = os.getenv('STORAGE_TYPE', 'local')
+    STORAGE_PATH: Path = Path('./storage')
+    STORAGE_TYPE: str = 'local'
 
-    ETHEREUM_RPC_URL: str = os.getenv('ETHEREUM_RPC_URL', 'http://localhost:8545')
-    CHAIN_ID: int = int(os.getenv('CHAIN_ID', '1337'))
-    PRIVATE_KEY: str = os.getenv('PRIVATE_KEY', '')
-    CONTRACT_ADDRESS: str = os.getenv('CONTRACT_ADDRESS', '')
+    ETHEREUM_RPC_URL: str = 'http://localhost:8545'
+    CHAIN_ID: int = 1337
+    PRIVATE_KEY: str = ''
+    CONTRACT_ADDRESS: str = ''
 
-    IPFS_ADDR: str = os.getenv('IPFS_ADDR', '/ip4/127.0.0.1/tcp/5001')
+    IPFS_ADDR: str = '/ip4/127.0.0.1/tcp/5001'
 
-    AWS_ACCESS_KEY_ID: str = os.getenv('AWS_ACCESS_KEY_ID', '')
-    AWS_SECRET_ACCESS_KEY: str = os.getenv('AWS_SECRET_ACCESS_KEY', '')
-    AWS_REGION: str = os.getenv('AWS_REGION', 'us-east-1')
-    S3_BUCKET_NAME: str = os.getenv('S3_BUCKET_NAME', '')
+    AWS_ACCESS_KEY_ID: str = ''
+    AWS_SECRET_ACCESS_KEY: str = ''
+    AWS_REGION: str = 'us-east-1'
+    S3_BUCKET_NAME: str = ''
 
-    MODEL_PATH: str = os.getenv('MODEL_PATH', 'ml/models/credit_risk_model.pkl')
-    SCALER_PATH: str = os.getenv('SCALER_PATH', 'ml/models/feature_scaler.pkl')
+    MODEL_PATH: str = 'ml/models/credit_risk_model.pkl'
+    SCALER_PATH: str = 'ml/models/feature_scaler.pkl'
 
-    OCR_ENGINE: str = os.getenv('OCR_ENGINE', 'tesseract')
-    TESSERACT_CMD: str = os.getenv('TESSERACT_CMD', '/usr/bin/tesseract')
+    OCR_ENGINE: str = 'tesseract'
+    TESSERACT_CMD: str = '/usr/bin/tesseract'
 
     MIN_AGE: int = 18
     MAX_LOAN_AMOUNT: float = 1000.0
     MIN_LOAN_AMOUNT: float = 0.01
 
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+
     LOW_RISK_THRESHOLD: int = 500
     MEDIUM_RISK_THRESHOLD: int = 1500
 
-settings = Settings()
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()
@@ -0,0 +1,62 @@
+"""
+Shared service instances for FastAPI dependency injection
+
+Services are built lazily on first use so importing the app (and every
+uvicorn --reload cycle) only pays for route registration.
+"""
+import threading
+from functools import lru_cache, wraps
+
+from app.services.kyc_service import KYCService
+from app.services.ocr_service import OCRService
+from app.services.ml_service import MLService
+from app.services.storage_service import StorageService
+from app.services.blockchain_service import BlockchainService
+
+
+def _singleton(factory):
+    """Cache a zero-arg factory, building it at most once across threads"""
+    cached = lru_cache(maxsize=1)(factory)
+    lock = threading.RLock()
+
+    @wraps(factory)
+    def getter():
+        with lock:
+            return cached()
+
+    getter.cache_clear = cached.cache_clear
+    return getter
+
+
+@_singleton
+def get_ocr_service() -> OCRService:
+    return OCRService()
+
+
+@_singleton
+def get_kyc_service() -> KYCService:
+    return KYCService(get_ocr_service(), get_storage_service())
+
+
+@_singleton
+def get_ml_service() -> MLService:
+    return MLService()
+
+
+@_singleton
+def get_storage_service() -> StorageService:
+    return StorageService()
+
+
+@_singleton
+def get_blockchain_service() -> BlockchainService:
+    return BlockchainService()
+
+
+def warm_services() -> None:
+    """Build every service up front (model load, ledger read, RPC setup)"""
+    for getter in (
+        get_kyc_service, get_ocr_service, get_ml_service,
+        get_storage_service, get_blockchain_service
+    ):
+        getter()
@@ -1,17 +1,57 @@
 """
 Pydantic models for request/response validation
 """
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, Dict, List, Any
+from pydantic import AfterValidator, BaseModel, Field, StringConstraints, field_validator
+from typing import Annotated, Optional, Dict, List, Any
 from datetime import datetime
+import re
+
+import numpy as np
+
+from app.config import settings
+
+
+# ==================== SHARED PATTERNS ====================
+
+ETH_ADDRESS_PATTERN = r'^0x[a-fA-F0-9]{40}$'
+HEX_HASH_PATTERN = r'^(0x)?[a-fA-F0-9]{64}$'
+PHONE_PATTERN = r'^\+?[1-9]\d{1,14}$'
+RISK_PATTERN = r'^(Low|Medium|High)$'
+
+EthAddress = Annotated[str, StringConstraints(pattern=ETH_ADDRESS_PATTERN)]
+HexHash = Annotated[str, StringConstraints(pattern=HEX_HASH_PATTERN)]
+PhoneNumber = Annotated[str, StringConstraints(pattern=PHONE_PATTERN)]
+RiskCategory = Annotated[str, StringConstraints(pattern=RISK_PATTERN)]
+
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+def _fast_email(v: str) -> str:
+    if not _EMAIL_RE.match(v):
+        raise ValueError('invalid email')
+    return v
+
+
+FastEmail = Annotated[str, AfterValidator(_fast_email)]
+
+FEATURE_ORDER = (
+    'income', 'employment_length', 'debt_to_income',
+    'credit_inquiries', 'loan_amount', 'loan_term',
+)
+_REQUIRED_FEATURES: frozenset[str] = frozenset(FEATURE_ORDER)
+
+
+def feature_vector(**kw: float) -> np.ndarray:
+    """Model input row in FEATURE_ORDER, built without an intermediate list"""
+    return np.fromiter((kw[k] for k in FEATURE_ORDER), dtype=np.float64, count=len(FEATURE_ORDER))
 
 
 # ==================== KYC SCHEMAS ====================
 
 class KYCSubmission(BaseModel):
     full_name: str = Field(..., min_length=2, max_length=100)
-    email: EmailStr
-    phone: str = Field(..., pattern=r'^\+?[1-9]\d{1,14}$')
+    email: FastEmail
+    phone: PhoneNumber
     
     class Config:
         json_schema_extra = {
@@ -36,11 +76,10 @@ class KYCResponse(BaseModel):
 class ScoreRequest(BaseModel):
     features: Dict[str, float] = Field(..., description="Feature dictionary for ML model")
     
-    @validator('features')
+    @field_validator('features', mode='after')
+    @classmethod
     def validate_features(cls, v):
-        required_keys = ['income', 'employment_length', 'debt_to_income', 
-                        'credit_inquiries', 'loan_amount', 'loan_term']
-        missing = set(required_keys) - set(v.keys())
+        missing = _REQUIRED_FEATURES.difference(v)
         if missing:
             raise ValueError(f"Missing required features: {missing}")
         return v
@@ -67,7 +106,7 @@ class ScoreRequest(BaseModel):
 class ScoreResponse(BaseModel):
     success: bool
     probability_of_default: int = Field(..., description="PD in basis points")
-    risk_category: str = Field(..., pattern="^(Low|Medium|High)$")
+    risk_category: RiskCategory
     explanation_hash: str
     shap_summary: Dict[str, Any]
     storage_url: Optional[str] = None
@@ -76,16 +115,12 @@ class ScoreResponse(BaseModel):
 # ==================== LOAN SCHEMAS ====================
 
 class LoanRequest(BaseModel):
-    principal: float = Field(..., gt=0, description="Loan amount in ETH")
+    principal: float = Field(
+        ..., ge=settings.MIN_LOAN_AMOUNT, le=settings.MAX_LOAN_AMOUNT, description="Loan amount in ETH"
+    )
     term_days: int = Field(..., ge=7, le=365, description="Loan term in days")
     interest_rate: int = Field(..., ge=0, le=10000, description="Interest rate in basis points")
     
-    @validator('principal')
-    def validate_principal(cls, v):
-        if v < 0.01 or v > 1000:
-            raise ValueError("Principal must be between 0.01 and 1000 ETH")
-        return v
-    
     class Config:
         json_schema_extra = {
             "example": {
@@ -97,14 +132,14 @@ class LoanRequest(BaseModel):
 
 
 class LoanCreationRequest(BaseModel):
-    principal: float = Field(..., gt=0)
+    principal: float = Field(..., ge=settings.MIN_LOAN_AMOUNT, le=settings.MAX_LOAN_AMOUNT)
     term_days: int = Field(..., ge=7, le=365)
     interest_rate: int = Field(..., ge=0, le=10000)
-    kyc_hash: str = Field(..., min_length=64, max_length=66)
-    explanation_hash: str = Field(..., min_length=64, max_length=66)
-    risk_category: str = Field(..., pattern="^(Low|Medium|High)$")
+    kyc_hash: HexHash
+    explanation_hash: HexHash
+    risk_category: RiskCategory
     probability_of_default: int = Field(..., ge=0, le=10000)
-    borrower_address: str = Field(..., pattern=r'^0x[a-fA-F0-9]{40}$')
+    borrower_address: EthAddress
     
     class Config:
         json_schema_extra = {
@@ -152,14 +187,14 @@ class CompleteLoanApplication(BaseModel):
     """Schema for end-to-end loan application"""
     # Personal info
     full_name: str
-    email: EmailStr
+    email: FastEmail
     phone: str
     
     # Loan details
-    principal: float = Field(..., gt=0)
+    principal: float = Field(..., ge=settings.MIN_LOAN_AMOUNT, le=settings.MAX_LOAN_AMOUNT)
     term_days: int = Field(..., ge=7, le=365)
     interest_rate: int = Field(..., ge=0, le=10000)
-    borrower_address: str = Field(..., pattern=r'^0x[a-fA-F0-9]{40}$')
+    borrower_address: EthAddress
     
     # Credit features
     income: float = Field(..., gt=0)
@@ -1,24 +1,33 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from typing import Annotated
+import logging
+
 from app.services.kyc_service import KYCService
+from app.deps import get_kyc_service
+from app.config import settings
+from app.utils.common import check_upload_size, read_upload
+
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/kyc", tags=["KYC"])
-kyc_service = KYCService()
 
 
 @router.post("/submit")
 async def submit_kyc(
+    id_document: Annotated[UploadFile, File()],
+    selfie: Annotated[UploadFile, File()],
     full_name: str = Form(...),
     email: str = Form(...),
     phone: str = Form(...),
-    id_document: UploadFile = File(...),
-    selfie: UploadFile = File(...),
+    kyc_service: KYCService = Depends(get_kyc_service),
 ):
-    print("=== DEBUG: KYC Upload ===")
-    print("ID filename:", id_document.filename)
-    print("ID content_type:", id_document.content_type)
-    print("Selfie filename:", selfie.filename)
-    print("Selfie content_type:", selfie.content_type)
-    print("=========================")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "KYC upload id=%s type=%s selfie=%s/%s",
+            id_document.filename, id_document.content_type,
+            selfie.filename, selfie.content_type
+        )
 
     allowed_types = {"image/png", "image/jpeg"}
 
@@ -28,8 +37,11 @@ async def submit_kyc(
     if selfie.content_type not in allowed_types:
         raise HTTPException(400, "Selfie must be an image")
 
-    id_bytes = await id_document.read()
-    selfie_bytes = await selfie.read()
+    check_upload_size(id_document, settings.MAX_UPLOAD_BYTES, "ID document")
+    check_upload_size(selfie, settings.MAX_UPLOAD_BYTES, "Selfie")
+
+    id_bytes = await read_upload(id_document, max_bytes=settings.MAX_UPLOAD_BYTES)
+    selfie_bytes = await read_upload(selfie, max_bytes=settings.MAX_UPLOAD_BYTES)
 
     result = await kyc_service.verify_kyc(
         full_name=full_name,
@@ -40,3 +52,12 @@ async def submit_kyc(
     )
 
     return result
+
+
+@router.get("/status/{kyc_hash}")
+async def get_kyc_status(kyc_hash: str, kyc_service: KYCService = Depends(get_kyc_service)):
+    """Get KYC verification status by hash"""
+    status = kyc_service.get_kyc_status(kyc_hash)
+    if not status:
+        raise HTTPException(status_code=404, detail="KYC record not found")
+    return status
@@ -1,16 +1,28 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
+import asyncio
+import logging
+
 from app.services.blockchain_service import BlockchainService
+from app.services.kyc_service import KYCService
+from app.services.storage_service import StorageService
 from app.models.schemas import LoanCreationRequest, LoanResponse
+from app.deps import get_blockchain_service, get_kyc_service, get_storage_service
+
 
+logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/loan", tags=["Loan"])
-blockchain = BlockchainService()
+router = APIRouter(prefix="/api", tags=["Loan"])
 
 
-@router.post("/create", response_model=LoanResponse)
-async def create_loan(request: LoanCreationRequest):
+@router.post("/loan/create", response_model=LoanResponse)
+async def create_loan(
+    request: LoanCreationRequest,
+    blockchain: BlockchainService = Depends(get_blockchain_service)
+):
 
-    tx = blockchain.create_loan(
+    tx = await asyncio.to_thread(
+        blockchain.create_loan,
         principal=request.principal,
         term_days=request.term_days,
         interest_rate=request.interest_rate,
@@ -24,9 +36,125 @@ async def create_loan(request: LoanCreationRequest):
     if not tx.get("success"):
         raise HTTPException(status_code=500, detail=tx["error"])
 
-    return {
+    return ORJSONResponse({
         "success": True,
         "loan_id": tx.get("loan_id"),
         "transaction_hash": tx.get("tx_hash"),
-        "message": "Loan created successfully"
-    }
+        "message": "Loan created successfully",
+        "loan_details": None
+    })
+
+
+@router.post("/loans/create", response_model=LoanResponse)
+async def create_verified_loan(
+    request: LoanCreationRequest,
+    blockchain: BlockchainService = Depends(get_blockchain_service),
+    kyc_service: KYCService = Depends(get_kyc_service),
+    storage_service: StorageService = Depends(get_storage_service)
+):
+    """
+    Create a loan on the blockchain
+
+    Process:
+    1. Validate KYC_HASH exists
+    2. Validate EXPLANATION_HASH exists
+    3. Call smart contract createLoan()
+    4. Return transaction details
+    """
+    logger.info(f"Loan creation request: {request.principal} ETH")
+
+    # Step 1: Verify KYC exists
+    if not kyc_service.kyc_exists(request.kyc_hash):
+        raise HTTPException(status_code=400, detail="Invalid KYC hash")
+
+    # Step 2: Verify explanation exists
+    if not storage_service.explanation_exists(request.explanation_hash):
+        raise HTTPException(status_code=400, detail="Invalid explanation hash")
+
+    # Step 3: Create loan on blockchain
+    tx_result = await asyncio.to_thread(
+        blockchain.create_loan,
+        principal=request.principal,
+        term_days=request.term_days,
+        interest_rate=request.interest_rate,
+        kyc_hash=request.kyc_hash,
+        explanation_hash=request.explanation_hash,
+        risk_category=request.risk_category,
+        probability_of_default=request.probability_of_default,
+        borrower_address=request.borrower_address
+    )
+
+    if not tx_result.get('success'):
+        raise HTTPException(
+            status_code=500,
+            detail=f"Blockchain transaction failed: {tx_result.get('error')}"
+        )
+
+    return LoanResponse(
+        success=True,
+        loan_id=tx_result['loan_id'],
+        transaction_hash=tx_result['tx_hash'],
+        message="Loan created successfully",
+        loan_details={
+            "principal": request.principal,
+            "term_days": request.term_days,
+            "interest_rate": request.interest_rate,
+            "risk_category": request.risk_category,
+            "kyc_hash": request.kyc_hash,
+            "explanation_hash": request.explanation_hash
+        }
+    )
+
+
+@router.get("/loans/{loan_id}")
+async def get_loan(loan_id: int, blockchain: BlockchainService = Depends(get_blockchain_service)):
+    """Get loan details from blockchain"""
+    loan_details = await asyncio.to_thread(blockchain.get_loan, loan_id)
+    if not loan_details:
+        raise HTTPException(status_code=404, detail="Loan not found")
+    return loan_details
+
+
+@router.get("/loans/borrower/{address}")
+async def get_borrower_loans(
+    address: str,
+    blockchain: BlockchainService = Depends(get_blockchain_service)
+):
+    """Get all loans for a borrower address"""
+    loans = await asyncio.to_thread(blockchain.get_borrower_loans, address)
+    return {"address": address, "loans": loans}
+
+
+@router.post("/loans/{loan_id}/fund")
+async def fund_loan(
+    loan_id: int,
+    amount: float,
+    lender_address: str,
+    blockchain: BlockchainService = Depends(get_blockchain_service)
+):
+    """Fund a loan"""
+    result = await asyncio.to_thread(blockchain.fund_loan, loan_id, amount, lender_address)
+    return result
+
+
+@router.post("/loans/{loan_id}/disburse")
+async def disburse_loan(
+    loan_id: int,
+    borrower_address: str,
+    blockchain: BlockchainService = Depends(get_blockchain_service)
+):
+    """Disburse loan funds to borrower"""
+    result = await asyncio.to_thread(blockchain.disburse_loan, loan_id, borrower_address)
+    return result
+
+
+@router.post("/loans/{loan_id}/repay")
+async def repay_loan(
+    loan_id: int,
+    amount: float,
+    borrower_address: str,
+    blockchain: BlockchainService = Depends(get_blockchain_service)
+):
+    """Make a repayment on a loan"""
+    result = await asyncio.to_thread(blockchain.repay_loan, loan_id, amount, borrower_address)
+    return result
@@ -1,41 +1,81 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from app.services.ml_service import MLService
+from app.services.storage_service import StorageService
+from app.deps import get_ml_service, get_storage_service
 from app.models.schemas import ScoreRequest, ScoreResponse
+import asyncio
 import hashlib
-import json
-from pathlib import Path
+from functools import lru_cache
+
+import orjson
 
 router = APIRouter(prefix="/api/score", tags=["ML"])
-ml_service = MLService()
+
+
+@lru_cache(maxsize=4096)
+def _score(ml_service: MLService, features_key: bytes):
+    """
+    Predict and explain one canonical feature payload
+
+    Keyed on the sorted-key JSON of the features, so identical payloads reuse
+    the same SHAP explanation (and hash) instead of recomputing it. Failed
+    predictions raise and are therefore never cached.
+    """
+    features = orjson.loads(features_key)
+    result = ml_service.predict(features)
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=result.get("error"))
+    shap = ml_service.generate_shap_explanation(features)
+
+    exp_blob = orjson.dumps(shap)
+    exp_hash = "0x" + hashlib.sha256(exp_blob).hexdigest()
+    return result, shap, exp_blob, exp_hash
 
 
 @router.post("/predict", response_model=ScoreResponse)
-async def predict_score(request: ScoreRequest):
+async def predict_score(
+    request: ScoreRequest,
+    ml_service: MLService = Depends(get_ml_service),
+    storage_service: StorageService = Depends(get_storage_service)
+):
     VALID = ml_service.validate_features(request.features)
     if not VALID:
         raise HTTPException(status_code=400, detail="Invalid feature set")
 
-    result = ml_service.predict(request.features)
+    # Model inference and SHAP are CPU-bound; keep them off the event loop
+    features_key = orjson.dumps(request.features, option=orjson.OPT_SORT_KEYS)
+    result, shap, exp_blob, exp_hash = await asyncio.to_thread(_score, ml_service, features_key)
 
     prob = result["probability"]
     prob_bp = int(prob * 10000)
     risk = result["risk_category"]
 
-    shap = ml_service.generate_shap_explanation(request.features)
+    # StorageService creates the explanations directory once at startup;
+    # the name is the content hash, so an existing file is already correct
+    file_path = storage_service.explanation_path / f"{exp_hash}.json"
+    if not file_path.exists():
+        await asyncio.to_thread(file_path.write_bytes, exp_blob)
 
-    exp_json = json.dumps(shap)
-    exp_hash = "0x" + hashlib.sha256(exp_json.encode()).hexdigest()
-
-    path = Path("storage/explanations")
-    path.mkdir(parents=True, exist_ok=True)
-    file_path = path / f"{exp_hash}.json"
-    file_path.write_text(exp_json)
-
-    return {
+    # Payload is built here from trusted values; skip response_model validation
+    # and jsonable_encoder and let orjson serialize it (numpy included) directly
+    return ORJSONResponse({
         "success": True,
         "probability_of_default": prob_bp,
         "risk_category": risk,
         "explanation_hash": exp_hash,
         "shap_summary": shap,
         "storage_url": str(file_path)
-    }
+    })
+
+
+@router.get("/explanation/{explanation_hash}")
+async def get_explanation(
+    explanation_hash: str,
+    storage_service: StorageService = Depends(get_storage_service)
+):
+    """Retrieve full SHAP explanation by hash"""
+    explanation = storage_service.retrieve_explanation(explanation_hash)
+    if not explanation:
+        raise HTTPException(status_code=404, detail="Explanation not found")
+    return explanation
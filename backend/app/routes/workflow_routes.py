@@ -0,0 +1,170 @@
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from typing import Annotated
+import asyncio
+from datetime import datetime
+import logging
+
+from app.services.kyc_service import KYCService
+from app.services.ocr_service import OCRService
+from app.services.ml_service import MLService
+from app.services.storage_service import StorageService
+from app.services.blockchain_service import BlockchainService
+from app.models.schemas import feature_vector
+from app.utils.hash_utils import generate_hash
+from app.deps import (
+    get_kyc_service, get_ocr_service, get_ml_service,
+    get_storage_service, get_blockchain_service
+)
+from app.config import settings
+from app.utils.common import check_upload_size, read_upload
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/workflow", tags=["Workflow"])
+
+
+@router.post("/complete-loan-application")
+async def complete_loan_application(
+    id_document: Annotated[UploadFile, File()],
+    selfie: Annotated[UploadFile, File()],
+    full_name: str = Form(...),
+    email: str = Form(...),
+    phone: str = Form(...),
+    principal: float = Form(...),
+    term_days: int = Form(...),
+    interest_rate: int = Form(...),
+    borrower_address: str = Form(...),
+    # Feature inputs for ML model
+    income: float = Form(...),
+    employment_length: int = Form(...),
+    debt_to_income: float = Form(...),
+    credit_inquiries: int = Form(...),
+    kyc_service: KYCService = Depends(get_kyc_service),
+    ocr_service: OCRService = Depends(get_ocr_service),
+    ml_service: MLService = Depends(get_ml_service),
+    storage_service: StorageService = Depends(get_storage_service),
+    blockchain_service: BlockchainService = Depends(get_blockchain_service)
+):
+    """
+    Complete end-to-end loan application workflow
+    
+    Steps:
+    1. KYC verification
+    2. ML credit scoring
+    3. Blockchain loan creation
+    """
+    logger.info(f"Complete loan application for {email}")
+    
+    check_upload_size(id_document, settings.MAX_UPLOAD_BYTES, "ID document")
+    check_upload_size(selfie, settings.MAX_UPLOAD_BYTES, "Selfie")
+    
+    id_doc_bytes = await read_upload(id_document, max_bytes=settings.MAX_UPLOAD_BYTES)
+    selfie_bytes = await read_upload(selfie, max_bytes=settings.MAX_UPLOAD_BYTES)
+    
+    features = {
+        "income": income,
+        "employment_length": employment_length,
+        "debt_to_income": debt_to_income,
+        "credit_inquiries": credit_inquiries,
+        "loan_amount": principal,
+        "loan_term": term_days
+    }
+    x = feature_vector(**features)
+    
+    # OCR and ML scoring only depend on the request, so run them side by
+    # side in the thread pool instead of blocking the event loop on each
+    logger.info("Steps 1-2: Processing KYC and running ML credit scoring...")
+    ocr_result, prediction_result, explanation = await asyncio.gather(
+        asyncio.to_thread(ocr_service.process_id_document, id_doc_bytes),
+        asyncio.to_thread(ml_service.predict, x),
+        asyncio.to_thread(ml_service.generate_shap_explanation, features)
+    )
+    
+    # STEP 1: KYC Verification
+    if not ocr_result.get('success'):
+        raise HTTPException(status_code=400, detail="KYC verification failed")
+    
+    extracted_data = ocr_result['data']
+    
+    if not kyc_service.verify_age(extracted_data.get('date_of_birth')):
+        raise HTTPException(status_code=400, detail="Age verification failed")
+    
+    if not kyc_service.verify_name_match(full_name, extracted_data.get('name', '')):
+        raise HTTPException(status_code=400, detail="Name verification failed")
+    
+    kyc_data = {
+        "full_name": full_name,
+        "email": email,
+        "phone": phone,
+        "extracted_name": extracted_data.get('name'),
+        "date_of_birth": extracted_data.get('date_of_birth'),
+        "id_number": extracted_data.get('id_number'),
+        "verification_timestamp": datetime.utcnow().isoformat()
+    }
+    
+    kyc_hash = generate_hash(kyc_data)
+    
+    # STEP 2: ML Credit Scoring
+    if not prediction_result.get('success'):
+        raise HTTPException(status_code=500, detail="Credit scoring failed")
+    
+    explanation_data = {
+        "features": features,
+        "prediction": prediction_result['prediction'],
+        "probability_of_default": prediction_result['probability'],
+        "risk_category": prediction_result['risk_category'],
+        "shap_values": explanation['shap_values'],
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    
+    explanation_hash = generate_hash(explanation_data)
+    
+    # Both records are independent writes
+    await asyncio.gather(
+        storage_service.store_kyc_documents_async(kyc_hash, id_doc_bytes, selfie_bytes, kyc_data),
+        storage_service.store_explanation_async(explanation_hash, explanation_data)
+    )
+    
+    logger.info(f"✓ KYC complete. Hash: {kyc_hash}")
+    logger.info(f"✓ ML scoring complete. Risk: {prediction_result['risk_category']}, Hash: {explanation_hash}")
+    
+    # STEP 3: Blockchain Loan Creation
+    logger.info("Step 3: Creating loan on blockchain...")
+    tx_result = await asyncio.to_thread(
+        blockchain_service.create_loan,
+        principal=principal,
+        term_days=term_days,
+        interest_rate=interest_rate,
+        kyc_hash=kyc_hash,
+        explanation_hash=explanation_hash,
+        risk_category=prediction_result['risk_category'],
+        probability_of_default=prediction_result['probability'],
+        borrower_address=borrower_address
+    )
+    
+    if not tx_result.get('success'):
+        raise HTTPException(status_code=500, detail="Blockchain transaction failed")
+    
+    logger.info(f"✓ Loan created on blockchain. Loan ID: {tx_result['loan_id']}")
+    
+    return {
+        "success": True,
+        "message": "Loan application completed successfully",
+        "kyc": {
+            "hash": kyc_hash,
+            "verified": True
+        },
+        "credit_score": {
+            "risk_category": prediction_result['risk_category'],
+            "probability_of_default": prediction_result['probability'],
+            "explanation_hash": explanation_hash
+        },
+        "loan": {
+            "loan_id": tx_result['loan_id'],
+            "transaction_hash": tx_result['tx_hash'],
+            "principal": principal,
+            "term_days": term_days,
+            "interest_rate": interest_rate
+        }
+    }
@@ -4,31 +4,152 @@ Resilient BlockchainService for local dev and real chain.
 - If not, uses a local JSON ledger at storage/loans.json so endpoints behave predictably for testing.
 """
 
-import os
-import json
 import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple
 
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
 from web3.middleware import geth_poa_middleware
 from eth_account import Account
 
+from app.config import settings
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+RPC_POOL_SIZE = 32
+# Fold the ledger journal into the loans.json snapshot once it grows past this
+LEDGER_COMPACT_BYTES = 1 << 20
+# Gas price is shared by every tx in a burst; reuse it for this many seconds
+GAS_PRICE_TTL = 2.0
+# RiskCategory enum order in LoanEscrow.sol
+_RC_MAP = {"Low": 0, "Medium": 1, "High": 2}
+_WEI = 10 ** 18
+
+# How often the receipt watcher checks for a new block head; matches the
+# poll_latency of web3's wait_for_transaction_receipt. The watcher thread only
+# runs while receipts are pending, so idle services do not poll at all
+RECEIPT_POLL_INTERVAL = 0.1
+
+
+@lru_cache(maxsize=None)
+def _load_artifact_abi(path: Path, mtime_ns: int) -> Any:
+    """
+    Parse a contract artifact once per process; preforked workers share the result
+
+    Keyed on mtime so a redeployed artifact is picked up. Only the "abi" entry is
+    kept, so the (much larger) bytecode strings are freed right after parsing.
+    """
+    contract_json = orjson.loads(path.read_bytes())
+    if isinstance(contract_json, dict) and "abi" in contract_json:
+        return contract_json["abi"]
+    # A bare ABI file rather than a full build artifact
+    return contract_json
+
+
+def _rpc_session() -> requests.Session:
+    """Keep-alive session with a connection pool sized for concurrent requests"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=RPC_POOL_SIZE, pool_maxsize=RPC_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class _ReceiptWatcher:
+    """
+    Resolve receipts for every in-flight transaction from one background thread
+
+    Instead of each sender polling eth_getTransactionReceipt on its own, the
+    watcher polls the block head once per interval and looks up all pending
+    receipts when a new block arrives. Hashes registered since the last poll are
+    looked up once regardless, since they may already be in the current head
+    (automine dev chains produce no further block). The thread exits when
+    nothing is pending.
+    """
+
+    def __init__(self, w3: Web3, poll_interval: float = RECEIPT_POLL_INTERVAL):
+        self._w3 = w3
+        self._poll_interval = poll_interval
+        self._pending: Dict[bytes, Future] = {}
+        # Registered but not yet looked up against any head
+        self._unchecked: Set[bytes] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def wait(self, tx_hash: bytes, timeout: float) -> Dict[str, Any]:
+        key = bytes(tx_hash)
+        future: Future = Future()
+        with self._lock:
+            self._pending[key] = future
+            self._unchecked.add(key)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="receipt-watcher", daemon=True)
+                self._thread.start()
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            # str() of the futures timeout is empty; give callers a usable error
+            raise TimeoutError("receipt_timeout") from None
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+                self._unchecked.discard(key)
+
+    def _run(self) -> None:
+        last_head = None
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                pending = list(self._pending.items())
+                unchecked, self._unchecked = self._unchecked, set()
+            try:
+                head = self._w3.eth.block_number
+                if head != last_head:
+                    to_check = pending
+                else:
+                    to_check = [(h, f) for h, f in pending if h in unchecked]
+                for tx_hash, future in to_check:
+                    try:
+                        receipt = self._w3.eth.get_transaction_receipt(tx_hash)
+                    except TransactionNotFound:
+                        continue
+                    if not future.done():
+                        future.set_result(receipt)
+                # Only once every lookup for this head went through
+                last_head = head
+            except Exception as e:
+                logger.warning(f"Receipt watcher poll failed: {e}")
+                # Retry the new hashes next round instead of waiting for a new block
+                with self._lock:
+                    self._unchecked |= unchecked & self._pending.keys()
+            time.sleep(self._poll_interval)
+
 
 class BlockchainService:
     def __init__(self):
         # Config
-        self.rpc_url = os.getenv("ETHEREUM_RPC_URL", "http://localhost:8545")
-        self.chain_id = int(os.getenv("CHAIN_ID", "1337"))
-        self.private_key = os.getenv("PRIVATE_KEY", "")  # optional for read-only
-        self.contract_address = os.getenv("CONTRACT_ADDRESS", "").strip()
+        self.rpc_url = settings.ETHEREUM_RPC_URL
+        self.chain_id = settings.CHAIN_ID
+        self.private_key = settings.PRIVATE_KEY  # optional for read-only
+        self.contract_address = settings.CONTRACT_ADDRESS.strip()
 
         # Web3 initialization (may be unreachable - handled below)
+        # One pooled session carries both web3 calls and our batched RPC posts
+        self._session = _rpc_session()
         try:
-            self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+            self.w3 = Web3(Web3.HTTPProvider(self.rpc_url, session=self._session))
             # inject PoA middleware if needed (safe to call even if not used)
             self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
             logger.info(f"Web3 provider set to {self.rpc_url}")
@@ -36,6 +157,8 @@ class BlockchainService:
             logger.warning(f"Failed to initialize Web3 provider: {e}")
             self.w3 = None
 
+        self._receipts = _ReceiptWatcher(self.w3) if self.w3 else None
+
         # Account handling
         if self.private_key:
             try:
@@ -53,15 +176,22 @@ class BlockchainService:
         self.abi = None
         self._load_contract()
 
+        # Local nonce counter, seeded from the node's pending count on first use
+        self._nonce: Optional[int] = None
+        self._nonce_lock = threading.Lock()
+        # (gas price in wei, time.monotonic() when fetched)
+        self._gas_price_cache: Tuple[int, float] = (0, 0.0)
+        self._gas_price_lock = threading.Lock()
+
         # Local fallback ledger for testing without a deployed contract
-        storage_dir = Path(os.getenv("STORAGE_PATH", "./storage"))
+        storage_dir = Path(settings.STORAGE_PATH)
         storage_dir.mkdir(parents=True, exist_ok=True)
         self._ledger_path = storage_dir / "loans.json"
+        self._journal_path = storage_dir / "loans.jsonl"
+        # create_loan may run off the event loop (workflow endpoint)
+        self._ledger_lock = threading.Lock()
         self._ensure_ledger_loaded()
 
-        # Loan counter for local ledger
-        self._local_counter = max([int(k) for k in self._ledger.keys()], default=0)
-
     # -----------------------------
     # Contract / ABI helpers
     # -----------------------------
@@ -72,9 +202,7 @@ class BlockchainService:
             abi_candidate = Path(__file__).resolve().parents[1] / "contracts" / "artifacts" / "LoanEscrow.json"
             if abi_candidate.exists():
                 try:
-                    with open(abi_candidate, "r", encoding="utf-8") as f:
-                        contract_json = json.load(f)
-                        self.abi = contract_json.get("abi", None) or contract_json
+                    self.abi = _load_artifact_abi(abi_candidate, abi_candidate.stat().st_mtime_ns)
                 except Exception as e:
                     logger.warning(f"Failed to read ABI from artifacts: {e}")
                     self.abi = None
@@ -85,6 +213,13 @@ class BlockchainService:
                 if Web3.is_address(self.contract_address):
                     checksum = Web3.to_checksum_address(self.contract_address)
                     self.contract = self.w3.eth.contract(address=checksum, abi=self.abi)
+                    # Resolve the write functions once instead of walking
+                    # contract.functions on every transaction
+                    fns = self.contract.functions
+                    self._fn_create = fns.createLoan
+                    self._fn_fund = fns.fundLoan
+                    self._fn_disburse = fns.disburse
+                    self._fn_repay = fns.repay
                     logger.info(f"Contract attached at {checksum}")
                 else:
                     logger.warning("CONTRACT_ADDRESS present but not a valid Ethereum address.")
@@ -130,39 +265,236 @@ class BlockchainService:
     # Local ledger (fallback)
     # -----------------------------
     def _ensure_ledger_loaded(self) -> None:
+        """Load the loans.json snapshot and replay the loans.jsonl journal on top"""
+        self._journal_fd = None
+        self._journal_size = 0
+        # Loan counter for local ledger, kept in the snapshot's "_meta" entry
+        self._local_counter = 0
+        # Lowercased borrower address -> loan ids
+        self._by_borrower: Dict[str, List[int]] = {}
         try:
             if self._ledger_path.exists():
-                with open(self._ledger_path, "r", encoding="utf-8") as f:
-                    self._ledger = json.load(f)
+                self._ledger = orjson.loads(self._ledger_path.read_bytes())
+                meta = self._ledger.pop("_meta", None)
+                if meta is not None:
+                    self._local_counter = int(meta.get("counter", 0))
+                else:
+                    # Snapshot written before "_meta" existed
+                    self._local_counter = max([int(k) for k in self._ledger.keys()], default=0)
             else:
                 self._ledger = {}
                 self._persist_ledger()
+            self._replay_journal()
+            for k, v in self._ledger.items():
+                self._by_borrower.setdefault(v.get("borrower", "").lower(), []).append(int(k))
+            self._journal_fd = os.open(self._journal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._journal_size = os.fstat(self._journal_fd).st_size
         except Exception as e:
             logger.error(f"Failed to load local ledger: {e}", exc_info=True)
             self._ledger = {}
 
-    def _persist_ledger(self) -> None:
+    def _replay_journal(self) -> None:
+        if not self._journal_path.exists():
+            return
+        # Byte offset just past the last complete entry
+        intact = 0
+        with open(self._journal_path, "rb") as f:
+            for line in f:
+                # A torn last line from a crash mid-write (cut short, or missing its
+                # newline); everything before it is intact
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    break
+                self._ledger.setdefault(str(record["id"]), {}).update(record["patch"])
+                if record["op"] == "create":
+                    self._local_counter = max(self._local_counter, int(record["id"]))
+                intact += len(line)
+            size = f.seek(0, os.SEEK_END)
+        if intact < size:
+            # Cut the torn tail off, or the next append would be glued onto it and
+            # that entry (and every one after it) lost on the following restart
+            logger.warning(f"Dropping {size - intact} bytes of truncated ledger journal")
+            os.truncate(self._journal_path, intact)
+
+    def _journal(self, loan_id: int, op: str, patch: Dict[str, Any]) -> None:
+        """Append one ledger mutation to the journal (caller holds _ledger_lock)"""
+        try:
+            line = orjson.dumps({"id": loan_id, "op": op, "patch": patch}) + b"\n"
+            os.write(self._journal_fd, line)
+            self._journal_size += len(line)
+            if self._journal_size > LEDGER_COMPACT_BYTES:
+                self._compact_ledger()
+        except Exception as e:
+            logger.error(f"Failed to journal ledger update: {e}", exc_info=True)
+
+    def _compact_ledger(self) -> None:
+        """Write a fresh snapshot, then empty the journal it now covers"""
+        if self._persist_ledger():
+            os.ftruncate(self._journal_fd, 0)
+            self._journal_size = 0
+
+    def _persist_ledger(self) -> bool:
         try:
-            with open(self._ledger_path, "w", encoding="utf-8") as f:
-                json.dump(self._ledger, f, indent=2, ensure_ascii=False)
+            # Write aside and rename so a crash never leaves a half-written snapshot
+            tmp_path = self._ledger_path.with_suffix(".json.tmp")
+            snapshot = {"_meta": {"counter": self._local_counter}, **self._ledger}
+            tmp_path.write_bytes(orjson.dumps(snapshot, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_path, self._ledger_path)
+            return True
         except Exception as e:
             logger.error(f"Failed to persist ledger: {e}", exc_info=True)
+            return False
 
     def _next_local_id(self) -> int:
         self._local_counter += 1
         return self._local_counter
 
+    # -----------------------------
+    # Transaction helpers
+    # -----------------------------
+    def _batch_rpc(self, calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        """Send several JSON-RPC calls in one HTTP POST; results keep call order (None on error)"""
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        resp = self._session.post(self.rpc_url, json=payload, timeout=30)
+        resp.raise_for_status()
+        by_id = {r.get("id"): r for r in resp.json()}
+        return [by_id.get(i, {}).get("result") for i in range(len(calls))]
+
+    def _reserve_nonce(self) -> int:
+        """Hand out the next nonce from the local counter"""
+        with self._nonce_lock:
+            if self._nonce is None:
+                self._nonce = self.w3.eth.get_transaction_count(self.account.address, "pending")
+            nonce = self._nonce
+            self._nonce += 1
+            return nonce
+
+    def _reset_nonce(self) -> None:
+        """Drop the local counter so the next reservation re-reads it from chain"""
+        with self._nonce_lock:
+            self._nonce = None
+
+    def _send_transaction(self, tx: Dict[str, Any]):
+        """
+        Assign the next nonce, sign and send a transaction, resyncing the nonce
+        if signing fails or the node rejects it
+        """
+        # The nonce is reserved only now, after build_transaction succeeded, so a
+        # call that fails to build never consumes one
+        tx = {**tx, "nonce": self._reserve_nonce()}
+        try:
+            signed = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
+        except Exception:
+            # The reserved nonce will never be sent; don't leave a gap behind it
+            self._reset_nonce()
+            raise
+        try:
+            return self.w3.eth.send_raw_transaction(signed.rawTransaction)
+        except Exception as e:
+            msg = str(e).lower()
+            if "known transaction" in msg or "already known" in msg:
+                # The node already holds this exact signed tx (e.g. a resend after a
+                # timeout); sending it again under a new nonce would double-spend
+                return signed.hash
+            # Any other failed send leaves a gap or a stale counter; re-read it from chain
+            self._reset_nonce()
+            if "nonce too low" not in msg:
+                raise
+            logger.warning(f"Nonce {tx['nonce']} rejected, retrying with fresh nonce: {e}")
+            tx = {**tx, "nonce": self._reserve_nonce()}
+            signed = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
+            return self.w3.eth.send_raw_transaction(signed.rawTransaction)
+
+    def _tx_params(self, fn, gas: Optional[int] = None, value: int = 0) -> Dict[str, Any]:
+        """
+        Build transaction params for a contract call in a single round trip
+
+        The gas estimate (when gas is not fixed) and, if the cached value is
+        stale, the gas price are fetched as one batched request. The nonce is
+        added by _send_transaction.
+        """
+        sender = self.account.address
+        estimate_call = None
+        if gas is None:
+            call = {"from": sender, "to": self.contract.address, "data": fn._encode_transaction_data()}
+            if value:
+                call["value"] = hex(value)
+            estimate_call = ("eth_estimateGas", [call])
+
+        gas_estimate = None
+        gas_price = self._fresh_gas_price()
+        if gas_price is None:
+            # Only one thread refreshes; the rest wait and reuse its result
+            with self._gas_price_lock:
+                gas_price = self._fresh_gas_price()
+                if gas_price is None:
+                    calls = [("eth_gasPrice", [])]
+                    if estimate_call:
+                        calls.append(estimate_call)
+                    results = self._batch_rpc(calls)
+                    gas_price = int(results[0], 16)
+                    self._gas_price_cache = (gas_price, time.monotonic())
+                    if estimate_call:
+                        gas_estimate = results[1]
+                        estimate_call = None
+        if estimate_call:
+            gas_estimate = self._batch_rpc([estimate_call])[0]
+
+        if gas is None:
+            # Estimate gas (safe guard)
+            gas = (int(gas_estimate, 16) if gas_estimate else 300000) + 50000
+
+        params = {
+            "from": sender,
+            "gas": gas,
+            "gasPrice": gas_price,
+            "chainId": self.chain_id
+        }
+        if value:
+            params["value"] = value
+        return params
+
+    def _fresh_gas_price(self) -> Optional[int]:
+        price, fetched_at = self._gas_price_cache
+        if time.monotonic() - fetched_at < GAS_PRICE_TTL:
+            return price
+        return None
+
     # -----------------------------
     # Utility converters
     # -----------------------------
     def _to_bytes32(self, value: str) -> bytes:
         """Convert hex string or text to 32-byte value for solidity bytes32."""
+        if value[:2] != "0x" or len(value) < 4:
+            return Web3.keccak(text=value)
+        digits = value[2:]
+        if len(digits) % 2:
+            digits = "0" + digits
         try:
-            if value.startswith("0x") and len(value) >= 4:
-                return Web3.to_bytes(hexstr=value)
+            raw = bytes.fromhex(digits)
+        except ValueError:
+            # Not actually hex; hash it like any other text
             return Web3.keccak(text=value)
-        except Exception:
-            return Web3.keccak(text=str(value))
+        # A full 0x + 64 hex digest is already 32 bytes; left-pad shorter values
+        return raw.rjust(32, b"\x00")
+
+    @staticmethod
+    def _bytes32_hex(value: Any) -> str:
+        """
+        Hex for a decoded bytes32, unprefixed as get_loan has always returned it
+
+        web3 6 decodes bytes32 call results to plain bytes, whose .hex() has no 0x;
+        bytes.hex also keeps HexBytes (a bytes subclass) from adding one
+        """
+        if isinstance(value, (bytes, bytearray)):
+            return bytes.hex(value)
+        return str(value)
 
     def _wei(self, eth_amount: float) -> int:
         if self.w3:
@@ -195,33 +527,17 @@ class BlockchainService:
                 # Prepare bytes32
                 kyc_b = self._to_bytes32(kyc_hash)
                 expl_b = self._to_bytes32(explanation_hash)
-                rc_map = {"Low": 0, "Medium": 1, "High": 2}
-                rc_val = rc_map.get(risk_category, 1)
+                rc_val = _RC_MAP.get(risk_category, 1)
 
                 principal_wei = self._wei(principal)
 
-                nonce = self.w3.eth.get_transaction_count(self.account.address)
-                # Estimate gas (safe guard)
-                try:
-                    gas_est = self.contract.functions.createLoan(
-                        principal_wei, term_days, interest_rate, kyc_b, expl_b, rc_val, probability_of_default
-                    ).estimate_gas({"from": self.account.address})
-                except Exception:
-                    gas_est = 300000
-
-                tx = self.contract.functions.createLoan(
+                fn = self._fn_create(
                     principal_wei, term_days, interest_rate, kyc_b, expl_b, rc_val, probability_of_default
-                ).build_transaction({
-                    "from": self.account.address,
-                    "gas": gas_est + 50000,
-                    "gasPrice": self.w3.eth.gas_price,
-                    "nonce": nonce,
-                    "chainId": self.chain_id
-                })
-
-                signed = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
-                tx_hash = self.w3.eth.send_raw_transaction(signed.rawTransaction)
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+                )
+                tx = fn.build_transaction(self._tx_params(fn))
+
+                tx_hash = self._send_transaction(tx)
+                receipt = self._receipts.wait(tx_hash, timeout=300)
 
                 if receipt and receipt.get("status", 0) == 1:
                     loan_id = self._parse_loan_created_event(receipt) or 0
@@ -229,25 +545,27 @@ class BlockchainService:
                 return {"success": False, "error": "tx_failed", "tx_hash": tx_hash.hex()}
             else:
                 # Local ledger fallback
-                lid = self._next_local_id()
-                entry = {
-                    "loan_id": lid,
-                    "borrower": borrower_address,
-                    "principal": principal,
-                    "interest_rate": interest_rate,
-                    "term_days": term_days,
-                    "total_repayment": round(principal * (1 + interest_rate / 10000 * term_days / 365), 8),
-                    "amount_repaid": 0.0,
-                    "status": "Pending",
-                    "kyc_hash": kyc_hash,
-                    "explanation_hash": explanation_hash,
-                    "risk_category": risk_category,
-                    "probability_of_default": probability_of_default
-                }
-                self._ledger[str(lid)] = entry
-                self._persist_ledger()
-                logger.info(f"Local ledger: created loan {lid}")
-                return {"success": True, "loan_id": lid, "tx_hash": None}
+                with self._ledger_lock:
+                    lid = self._next_local_id()
+                    entry = {
+                        "loan_id": lid,
+                        "borrower": borrower_address,
+                        "principal": principal,
+                        "interest_rate": interest_rate,
+                        "term_days": term_days,
+                        "total_repayment": round(principal * (1 + interest_rate / 10000 * term_days / 365), 8),
+                        "amount_repaid": 0.0,
+                        "status": "Pending",
+                        "kyc_hash": kyc_hash,
+                        "explanation_hash": explanation_hash,
+                        "risk_category": risk_category,
+                        "probability_of_default": probability_of_default
+                    }
+                    self._ledger[str(lid)] = entry
+                    self._by_borrower.setdefault(borrower_address.lower(), []).append(lid)
+                    self._journal(lid, "create", entry)
+                    logger.info(f"Local ledger: created loan {lid}")
+                    return {"success": True, "loan_id": lid, "tx_hash": None}
         except Exception as e:
             logger.error(f"create_loan error: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
@@ -256,30 +574,23 @@ class BlockchainService:
         try:
             if self.contract and self.account:
                 amount_wei = self._wei(amount)
-                nonce = self.w3.eth.get_transaction_count(self.account.address)
-                tx = self.contract.functions.fundLoan(loan_id).build_transaction({
-                    "from": self.account.address,
-                    "value": amount_wei,
-                    "gas": 300000,
-                    "gasPrice": self.w3.eth.gas_price,
-                    "nonce": nonce,
-                    "chainId": self.chain_id
-                })
-                signed = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
-                tx_hash = self.w3.eth.send_raw_transaction(signed.rawTransaction)
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+                fn = self._fn_fund(loan_id)
+                tx = fn.build_transaction(self._tx_params(fn, gas=300000, value=amount_wei))
+                tx_hash = self._send_transaction(tx)
+                receipt = self._receipts.wait(tx_hash, timeout=300)
                 return {"success": receipt.get("status", 0) == 1, "tx_hash": tx_hash.hex(), "gas_used": receipt.get("gasUsed")}
             else:
-                key = str(loan_id)
-                if key not in self._ledger:
-                    return {"success": False, "error": "loan_not_found"}
-                # For simplicity treat full funding if amount >= principal
-                entry = self._ledger[key]
-                entry["funded_amount"] = entry.get("funded_amount", 0.0) + amount
-                if entry["funded_amount"] >= entry["principal"]:
-                    entry["status"] = "Funded"
-                self._persist_ledger()
-                return {"success": True, "tx_hash": None}
+                with self._ledger_lock:
+                    key = str(loan_id)
+                    if key not in self._ledger:
+                        return {"success": False, "error": "loan_not_found"}
+                    # For simplicity treat full funding if amount >= principal
+                    entry = self._ledger[key]
+                    entry["funded_amount"] = entry.get("funded_amount", 0.0) + amount
+                    if entry["funded_amount"] >= entry["principal"]:
+                        entry["status"] = "Funded"
+                    self._journal(loan_id, "fund", {"funded_amount": entry["funded_amount"], "status": entry["status"]})
+                    return {"success": True, "tx_hash": None}
         except Exception as e:
             logger.error(f"fund_loan error: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
@@ -287,25 +598,19 @@ class BlockchainService:
     def disburse_loan(self, loan_id: int, borrower_address: str) -> Dict[str, Any]:
         try:
             if self.contract and self.account:
-                nonce = self.w3.eth.get_transaction_count(self.account.address)
-                tx = self.contract.functions.disburse(loan_id).build_transaction({
-                    "from": self.account.address,
-                    "gas": 200000,
-                    "gasPrice": self.w3.eth.gas_price,
-                    "nonce": nonce,
-                    "chainId": self.chain_id
-                })
-                signed = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
-                tx_hash = self.w3.eth.send_raw_transaction(signed.rawTransaction)
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+                fn = self._fn_disburse(loan_id)
+                tx = fn.build_transaction(self._tx_params(fn, gas=200000))
+                tx_hash = self._send_transaction(tx)
+                receipt = self._receipts.wait(tx_hash, timeout=300)
                 return {"success": receipt.get("status", 0) == 1, "tx_hash": tx_hash.hex()}
             else:
-                key = str(loan_id)
-                if key not in self._ledger:
-                    return {"success": False, "error": "loan_not_found"}
-                self._ledger[key]["status"] = "Disbursed"
-                self._persist_ledger()
-                return {"success": True, "tx_hash": None}
+                with self._ledger_lock:
+                    key = str(loan_id)
+                    if key not in self._ledger:
+                        return {"success": False, "error": "loan_not_found"}
+                    self._ledger[key]["status"] = "Disbursed"
+                    self._journal(loan_id, "disburse", {"status": "Disbursed"})
+                    return {"success": True, "tx_hash": None}
         except Exception as e:
             logger.error(f"disburse_loan error: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
@@ -314,29 +619,22 @@ class BlockchainService:
         try:
             if self.contract and self.account:
                 amount_wei = self._wei(amount)
-                nonce = self.w3.eth.get_transaction_count(self.account.address)
-                tx = self.contract.functions.repay(loan_id).build_transaction({
-                    "from": self.account.address,
-                    "value": amount_wei,
-                    "gas": 200000,
-                    "gasPrice": self.w3.eth.gas_price,
-                    "nonce": nonce,
-                    "chainId": self.chain_id
-                })
-                signed = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
-                tx_hash = self.w3.eth.send_raw_transaction(signed.rawTransaction)
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+                fn = self._fn_repay(loan_id)
+                tx = fn.build_transaction(self._tx_params(fn, gas=200000, value=amount_wei))
+                tx_hash = self._send_transaction(tx)
+                receipt = self._receipts.wait(tx_hash, timeout=300)
                 return {"success": receipt.get("status", 0) == 1, "tx_hash": tx_hash.hex()}
             else:
-                key = str(loan_id)
-                if key not in self._ledger:
-                    return {"success": False, "error": "loan_not_found"}
-                entry = self._ledger[key]
-                entry["amount_repaid"] = round(entry.get("amount_repaid", 0.0) + amount, 8)
-                if entry["amount_repaid"] >= entry["total_repayment"]:
-                    entry["status"] = "Repaid"
-                self._persist_ledger()
-                return {"success": True, "tx_hash": None}
+                with self._ledger_lock:
+                    key = str(loan_id)
+                    if key not in self._ledger:
+                        return {"success": False, "error": "loan_not_found"}
+                    entry = self._ledger[key]
+                    entry["amount_repaid"] = round(entry.get("amount_repaid", 0.0) + amount, 8)
+                    if entry["amount_repaid"] >= entry["total_repayment"]:
+                        entry["status"] = "Repaid"
+                    self._journal(loan_id, "repay", {"amount_repaid": entry["amount_repaid"], "status": entry["status"]})
+                    return {"success": True, "tx_hash": None}
         except Exception as e:
             logger.error(f"repay_loan error: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
@@ -348,14 +646,15 @@ class BlockchainService:
                 return {
                     "loan_id": int(loan_raw[0]),
                     "borrower": loan_raw[1],
-                    "principal": float(self._from_wei(loan_raw[2])),
+                    # int / int true division is correctly rounded, same as float(Decimal)
+                    "principal": loan_raw[2] / _WEI,
                     "interest_rate": int(loan_raw[3]),
                     "term_days": int(loan_raw[4]),
-                    "total_repayment": float(self._from_wei(loan_raw[5])),
-                    "amount_repaid": float(self._from_wei(loan_raw[6])),
+                    "total_repayment": loan_raw[5] / _WEI,
+                    "amount_repaid": loan_raw[6] / _WEI,
                     "status": int(loan_raw[7]),
-                    "kyc_hash": loan_raw[8].hex() if hasattr(loan_raw[8], "hex") else str(loan_raw[8]),
-                    "explanation_hash": loan_raw[9].hex() if hasattr(loan_raw[9], "hex") else str(loan_raw[9])
+                    "kyc_hash": self._bytes32_hex(loan_raw[8]),
+                    "explanation_hash": self._bytes32_hex(loan_raw[9])
                 }
             else:
                 return self._ledger.get(str(loan_id))
@@ -373,11 +672,7 @@ class BlockchainService:
                 except Exception:
                     return []
             else:
-                out = []
-                for k, v in self._ledger.items():
-                    if v.get("borrower", "").lower() == address.lower():
-                        out.append(int(k))
-                return out
+                return list(self._by_borrower.get(address.lower(), ()))
         except Exception as e:
             logger.error(f"get_borrower_loans error: {e}", exc_info=True)
             return []
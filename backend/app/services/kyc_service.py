@@ -1,12 +1,15 @@
-import json
 import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional, Tuple
 from datetime import datetime, date
 import logging
 import cv2
 import numpy as np
-from difflib import SequenceMatcher
+import orjson
+from rapidfuzz import fuzz, process
 
 from app.config import settings
 from app.services.ocr_service import OCRService
@@ -15,42 +18,145 @@ from app.services.storage_service import StorageService
 
 logger = logging.getLogger(__name__)
 
+# Every ASCII char that is neither alphanumeric nor whitespace, dropped from names
+_NAME_STRIP = str.maketrans("", "", "".join(
+    c for c in map(chr, range(0x80)) if not (c.isalnum() or c.isspace())
+))
+
+# Records kept in memory in front of kyc.db; older ones are re-read on demand
+KYC_CACHE_SIZE = 10_000
+
+# Date layouts seen on ID documents, tried in order when the shape is ambiguous
+_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%d-%m-%Y",
+    "%d/%m/%Y",
+    "%b %d %Y",
+    "%d %b %Y"
+)
+
 
 class KYCService:
-    def __init__(self):
+    def __init__(
+        self,
+        ocr_service: Optional[OCRService] = None,
+        storage_service: Optional[StorageService] = None
+    ):
+        # Shared engines are injected by app.deps; build our own only when used standalone
+        self.ocr = ocr_service or OCRService()
+        self.storage = storage_service or StorageService()
+
         storage_root = Path(settings.STORAGE_PATH or "./storage")
         storage_root.mkdir(parents=True, exist_ok=True)
-        self._store_path = storage_root / "kyc_records.json"
+        self._legacy_path = storage_root / "kyc_records.json"
 
-        self.kyc_records: Dict[str, Dict[str, Any]] = {}
+        # One row per record: inserts touch the primary-key index only, instead
+        # of re-serializing every record on each add
+        self._db = sqlite3.connect(
+            storage_root / "kyc.db", isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS kyc ("
+            "hash TEXT PRIMARY KEY, data TEXT NOT NULL, created_at TEXT NOT NULL)"
+        )
+
+        # Bounded LRU over the database; sqlite stays the source of truth
+        self.kyc_records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._records_lock = threading.Lock()
         self._load()
 
     # ======================================================
     # Persistence
     # ======================================================
+    @staticmethod
+    def _row_to_record(kyc_hash: str, data: str, created_at: str) -> Dict[str, Any]:
+        return {
+            "kyc_hash": kyc_hash,
+            "data": orjson.loads(data),
+            "created_at": created_at
+        }
+
     def _load(self):
+        """Warm kyc_records with the most recent records at startup"""
         try:
-            if self._store_path.exists():
-                with open(self._store_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.kyc_records = data if isinstance(data, dict) else {}
-        except:
-            self.kyc_records = {}
+            self._import_legacy_json()
+            rows = self._db.execute(
+                "SELECT hash, data, created_at FROM kyc ORDER BY created_at DESC LIMIT ?",
+                (KYC_CACHE_SIZE,)
+            ).fetchall()
+            # Oldest first, so the newest end up at the LRU's hot end
+            for row in reversed(rows):
+                self.kyc_records[row[0]] = self._row_to_record(*row)
+        except Exception as e:
+            logger.error(f"Failed loading KYC records: {e}")
+            self.kyc_records.clear()
 
-    def _save(self):
+    def _remember(self, kyc_hash: str, record: Dict[str, Any]):
+        with self._records_lock:
+            self.kyc_records[kyc_hash] = record
+            self.kyc_records.move_to_end(kyc_hash)
+            if len(self.kyc_records) > KYC_CACHE_SIZE:
+                self.kyc_records.popitem(last=False)
+
+    def _get_record(self, kyc_hash: str) -> Optional[Dict[str, Any]]:
+        """Cached record, falling back to a primary-key lookup in kyc.db"""
+        with self._records_lock:
+            record = self.kyc_records.get(kyc_hash)
+            if record is not None:
+                self.kyc_records.move_to_end(kyc_hash)
+                return record
         try:
-            with open(self._store_path, "w", encoding="utf-8") as f:
-                json.dump(self.kyc_records, f, indent=2)
+            row = self._db.execute(
+                "SELECT hash, data, created_at FROM kyc WHERE hash = ?", (kyc_hash,)
+            ).fetchone()
         except Exception as e:
-            logger.error(f"Failed saving KYC records: {e}")
+            logger.error(f"Failed reading KYC record: {e}")
+            return None
+        if row is None:
+            return None
+        record = self._row_to_record(*row)
+        self._remember(kyc_hash, record)
+        return record
+
+    def _import_legacy_json(self):
+        """Carry records over from kyc_records.json into an empty database"""
+        if not self._legacy_path.exists():
+            return
+        if self._db.execute("SELECT 1 FROM kyc LIMIT 1").fetchone():
+            return
+        data = orjson.loads(self._legacy_path.read_bytes())
+        if not isinstance(data, dict):
+            return
+        rows = [
+            (k, orjson.dumps(v.get("data")).decode(), v.get("created_at") or "")
+            for k, v in data.items()
+        ]
+        with self._db:
+            self._db.executemany("INSERT OR IGNORE INTO kyc VALUES (?, ?, ?)", rows)
+        logger.info(f"Imported {len(rows)} KYC records from {self._legacy_path}")
 
     def add_kyc_record(self, kyc_hash: str, data: Dict[str, Any]):
-        self.kyc_records[kyc_hash] = {
+        record = {
             "kyc_hash": kyc_hash,
             "data": data,
             "created_at": datetime.utcnow().isoformat()
         }
-        self._save()
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO kyc VALUES (?, ?, ?)",
+                (kyc_hash, orjson.dumps(data).decode(), record["created_at"])
+            )
+        except Exception as e:
+            logger.error(f"Failed saving KYC record: {e}")
+        self._remember(kyc_hash, record)
+
+    def kyc_exists(self, kyc_hash: str) -> bool:
+        return self._get_record(kyc_hash) is not None
+
+    def get_kyc_status(self, kyc_hash: str) -> Optional[Dict[str, Any]]:
+        return self._get_record(kyc_hash)
 
     # ======================================================
     # Public API — main KYC workflow
@@ -64,11 +170,8 @@ class KYCService:
         selfie_bytes: bytes
     ) -> Dict[str, Any]:
 
-        ocr = OCRService()
-        storage = StorageService()
-
         # 1) OCR
-        ocr_result = ocr.process_id_document(id_document_bytes)
+        ocr_result = self.ocr.process_id_document(id_document_bytes)
         if not ocr_result.get("success"):
             return {"success": False, "verified": False, "message": "OCR failed"}
 
@@ -100,8 +203,12 @@ class KYCService:
             return {"success": False, "verified": False, "message": "Face mismatch"}
 
         # 5) Create hash
-        combined = f"{full_name}{email}{phone}{extracted_name}{extracted_dob}{extracted_id}"
-        kyc_hash = hashlib.sha256(combined.encode()).hexdigest()
+        # Content identifier only (not a security primitive); BLAKE2b-256 keeps the
+        # 64-hex-char shape. "|" separators keep field boundaries unambiguous
+        combined = "|".join(
+            str(v) for v in (full_name, email, phone, extracted_name, extracted_dob, extracted_id)
+        )
+        kyc_hash = hashlib.blake2b(combined.encode("utf-8"), digest_size=32).hexdigest()
 
         # 6) Save
         record = {
@@ -115,7 +222,7 @@ class KYCService:
         }
 
         self.add_kyc_record(kyc_hash, record)
-        storage.save_json(f"kyc_{kyc_hash}.json", record)
+        self.storage.store_kyc_documents(kyc_hash, id_document_bytes, selfie_bytes, record)
 
         return {
             "success": True,
@@ -138,7 +245,44 @@ class KYCService:
         if a == b:
             return True
 
-        return SequenceMatcher(None, a, b).ratio() >= threshold
+        # fuzz.ratio is 1 - indel_distance / (len_a + len_b) and the distance is
+        # at least the length gap, so a large gap can't reach the threshold
+        total = len(a) + len(b)
+        if 1 - abs(len(a) - len(b)) / total < threshold:
+            return False
+
+        # score_cutoff lets rapidfuzz bail out early on clearly different names
+        cutoff = threshold * 100
+        return fuzz.ratio(a, b, score_cutoff=cutoff) >= cutoff
+
+    def best_name_match(
+        self,
+        name: str,
+        candidates: Iterable[str],
+        threshold: float = 0.80
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Compare one name against many (e.g. stored KYC names for dedup)
+
+        extractOne preprocesses the query once and reuses it for every
+        candidate, the rapidfuzz counterpart of SequenceMatcher.set_seq2.
+
+        Returns:
+            (candidate, similarity in [0, 1]) for the best match at or above
+            threshold, else None
+        """
+        if not name:
+            return None
+        match = process.extractOne(
+            name,
+            candidates,
+            scorer=fuzz.ratio,
+            processor=self._normalize_name,
+            score_cutoff=threshold * 100
+        )
+        if match is None:
+            return None
+        return match[0], match[1] / 100.0
 
     def verify_age(self, dob_str: Optional[str]) -> bool:
         if not dob_str:
@@ -158,22 +302,35 @@ class KYCService:
     # Helpers → parsing + normalizing
     # ======================================================
     def _normalize_name(self, name: str) -> str:
-        cleaned = "".join(ch for ch in name if ch.isalnum() or ch.isspace())
+        if name.isascii():
+            # One C-level pass instead of a per-character Python filter
+            cleaned = name.translate(_NAME_STRIP)
+        else:
+            cleaned = "".join(ch for ch in name if ch.isalnum() or ch.isspace())
         return " ".join(cleaned.lower().split())
 
     def _parse_date_string(self, s: str) -> Optional[date]:
-        from datetime import datetime
-        formats = [
-            "%Y-%m-%d",
-            "%d-%m-%Y",
-            "%d/%m/%Y",
-            "%b %d %Y",
-            "%d %b %Y"
-        ]
-        for fmt in formats:
+        # Pick the one layout the string can match from its shape, so the common
+        # cases cost a single parse instead of a chain of raised ValueErrors
+        if len(s) == 10 and s[4] == "-":
+            # ISO (YYYY-MM-DD); fromisoformat parses it in C
+            try:
+                return date.fromisoformat(s)
+            except ValueError:
+                return None
+        if len(s) == 10 and s[2] in "-/" and s[5] == s[2]:
+            candidates = (f"%d{s[2]}%m{s[2]}%Y",)
+        elif s[:1].isalpha():
+            candidates = ("%b %d %Y",)
+        elif " " in s:
+            candidates = ("%d %b %Y",)
+        else:
+            # Unpadded or unusual input: fall back to trying every layout
+            candidates = _DATE_FORMATS
+        for fmt in candidates:
             try:
                 return datetime.strptime(s, fmt).date()
-            except:
+            except ValueError:
                 pass
         return None
 
@@ -181,16 +338,26 @@ class KYCService:
     # Face matching
     # ======================================================
     def _compare_faces(self, id_bytes: bytes, selfie_bytes: bytes) -> bool:
+        # The same file uploaded as both ID and selfie is not a selfie; reject it
+        # without decoding (bytes equality is a length check + memcmp)
+        if id_bytes == selfie_bytes:
+            return False
+
         def prep(b):
             arr = np.frombuffer(b, np.uint8)
-            img = cv2.imdecode(arr, cv2.IMREAD_GRAYSCALE)
-            img = cv2.resize(img, (128, 128))
-            return img.astype("float32") / 255.0
+            # Let the JPEG decoder downscale 4x during IDCT; we only need 128x128.
+            # Small inputs would drop below that, so decode those at full size
+            img = cv2.imdecode(arr, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+            if img is not None and min(img.shape[:2]) < 128:
+                img = cv2.imdecode(arr, cv2.IMREAD_GRAYSCALE)
+            return cv2.resize(img, (128, 128))
 
         try:
             a = prep(id_bytes)
             b = prep(selfie_bytes)
-            diff = np.linalg.norm(a - b)
+            # One SIMD L2 pass on the uint8 images; scaling after is the same as
+            # normalizing both to [0, 1] first
+            diff = cv2.norm(a, b, cv2.NORM_L2) / 255.0
             return diff < 15.0
         except:
             return False
@@ -8,15 +8,37 @@ Provides:
 """
 
 import logging
+import threading
 import numpy as np
 from pathlib import Path
 import joblib
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple, Union
 
 from app.config import settings
+from app.models.schemas import FEATURE_ORDER
 
 logger = logging.getLogger(__name__)
 
+# Distinct feature rows remembered per MLService instance
+PREDICT_CACHE_SIZE = 4096
+
+
+def _mock_scores(
+    income: np.ndarray,
+    debt_to_income: np.ndarray,
+    credit_inquiries: np.ndarray,
+    loan_amount: np.ndarray
+) -> np.ndarray:
+    """Mock PD for any number of applicants in one vectorized expression"""
+    # income == -1 must fail like the scalar division it replaced, not score
+    # inf and get clipped into a "valid" PD of 1.0
+    with np.errstate(divide='raise', invalid='raise'):
+        score = loan_amount / (income + 1) + debt_to_income / 100 + credit_inquiries * 0.02
+    np.clip(score, 0, 1, out=score)
+    np.round(score, 4, out=score)
+    return score
+
 
 class MLService:
     def __init__(self):
@@ -40,15 +62,16 @@ class MLService:
         else:
             logger.warning("Model not found. Using mock ML model.")
 
-        # Required features for validation
-        self.expected_features = [
-            "income",
-            "employment_length",
-            "debt_to_income",
-            "credit_inquiries",
-            "loan_amount",
-            "loan_term",
-        ]
+        # Required features for validation, in model input order
+        self.expected_features = list(FEATURE_ORDER)
+
+        # Per-thread (1, n) input row reused across predictions; predict runs
+        # in worker threads, so a single shared buffer would race
+        self._local = threading.local()
+
+        # Per-instance memo of scored rows. Keyed on the model and scaler
+        # objects as well, so a model swapped in later never sees stale scores
+        self._predict_cached = lru_cache(maxsize=PREDICT_CACHE_SIZE)(self._score)
 
     # ------------------------------------------------------------
     # Feature Validation
@@ -66,8 +89,11 @@ class MLService:
     # ------------------------------------------------------------
     # Main Prediction
     # ------------------------------------------------------------
-    def predict(self, features: Dict[str, Any]) -> Dict[str, Any]:
+    def predict(self, features: Union[Dict[str, Any], np.ndarray]) -> Dict[str, Any]:
         """
+        Accepts either a feature dict or a vector already in FEATURE_ORDER
+        (see schemas.feature_vector).
+
         Returns:
             {
                 "success": True,
@@ -77,18 +103,12 @@ class MLService:
             }
         """
         try:
-            x = np.array([features[f] for f in self.expected_features], dtype=float).reshape(1, -1)
-
-            # Real model path
-            if self.model and self.scaler:
-                x_scaled = self.scaler.transform(x)
-                prob_default = float(self.model.predict_proba(x_scaled)[0][1])
+            if isinstance(features, np.ndarray):
+                key = tuple(features.ravel().tolist())
             else:
-                # MOCK model fallback
-                prob_default = self._mock_probability(features)
+                key = tuple(float(features[f]) for f in self.expected_features)
 
-            # Risk mapping
-            risk_cat = self._risk_category(prob_default)
+            prob_default, risk_cat = self._predict_cached(self.model, self.scaler, key)
 
             return {
                 "success": True,
@@ -101,6 +121,54 @@ class MLService:
             logger.error(f"Prediction error: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
 
+    def _score(self, model: Any, scaler: Any, key: Tuple[float, ...]) -> Tuple[float, str]:
+        """
+        Score one feature row given as a tuple in FEATURE_ORDER.
+
+        The model is deterministic, so re-submitted applications (form
+        refreshes, retries) are answered from the cache.
+        """
+        x = self._scratch()
+        x[0] = key
+
+        # Real model path
+        if model and scaler:
+            x_scaled = scaler.transform(x)
+            prob_default = float(model.predict_proba(x_scaled)[0][1])
+        else:
+            # MOCK model fallback
+            prob_default = self._mock_probability(x)
+
+        # Risk mapping
+        return prob_default, self._risk_category(prob_default)
+
+    def predict_batch(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Probability of default for many applicants at once
+        (e.g. recomputing risk across a portfolio).
+
+        Args:
+            features: column arrays keyed by feature name, all the same length
+
+        Returns:
+            (n,) float64 array of probabilities
+        """
+        cols = {f: np.asarray(features[f], dtype=np.float64) for f in self.expected_features}
+
+        if self.model and self.scaler:
+            x = np.column_stack([cols[f] for f in self.expected_features])
+            return self.model.predict_proba(self.scaler.transform(x))[:, 1]
+
+        return _mock_scores(
+            cols["income"], cols["debt_to_income"], cols["credit_inquiries"], cols["loan_amount"]
+        )
+
+    def _scratch(self) -> np.ndarray:
+        buf = getattr(self._local, "row", None)
+        if buf is None:
+            buf = self._local.row = np.empty((1, len(self.expected_features)), dtype=np.float64)
+        return buf
+
     # ------------------------------------------------------------
     # SHAP Explanation (Mock Until Model Exists)
     # ------------------------------------------------------------
@@ -113,14 +181,17 @@ class MLService:
                 # Real SHAP can be added later
                 pass
 
-            # Mock SHAP values
-            shap_vals = {f: round(np.random.uniform(-0.05, 0.05), 4) for f in self.expected_features}
+            # Mock SHAP values, drawn in one call
+            vals = np.round(np.random.uniform(-0.05, 0.05, size=len(self.expected_features)), 4)
+            shap_vals = dict(zip(self.expected_features, vals.tolist()))
 
-            importance = sorted(
-                [{"feature": f, "importance": abs(v)} for f, v in shap_vals.items()],
-                key=lambda x: x["importance"],
-                reverse=True
-            )
+            # Descending by magnitude; stable so ties keep feature order like sorted()
+            magnitudes = np.abs(vals)
+            order = np.argsort(-magnitudes, kind="stable")
+            importance = [
+                {"feature": self.expected_features[i], "importance": m}
+                for i, m in zip(order.tolist(), magnitudes[order].tolist())
+            ]
 
             return {
                 "success": True,
@@ -136,19 +207,12 @@ class MLService:
     # ------------------------------------------------------------
     # Utilities
     # ------------------------------------------------------------
-    def _mock_probability(self, features: Dict[str, float]) -> float:
+    def _mock_probability(self, x: np.ndarray) -> float:
         """
         Deterministic mock model so results are stable.
         """
-        inc = float(features["income"])
-        dti = float(features["debt_to_income"])
-        inquiries = float(features["credit_inquiries"])
-        loan_amt = float(features["loan_amount"])
-
-        score = (loan_amt / (inc + 1)) + (dti / 100) + (inquiries * 0.02)
-        score = min(max(score, 0), 1)
-
-        return round(score, 4)
+        # x is a (1, n) row in FEATURE_ORDER; same kernel as predict_batch
+        return float(_mock_scores(x[:, 0], x[:, 2], x[:, 3], x[:, 4])[0])
 
     def _risk_category(self, probability: float) -> str:
         """
@@ -2,13 +2,22 @@
 Storage Service for KYC documents and ML explanations
 Supports local file system, IPFS, and S3
 """
-import os
-import json
+import asyncio
+import gzip
 import hashlib
-from typing import Dict, Optional
+import io
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
 from pathlib import Path
 import logging
 
+import orjson
+
+from app.config import settings
+
 # Optional imports
 try:
     import ipfshttpclient
@@ -18,6 +27,9 @@ except ImportError:
 
 try:
     import boto3
+    from boto3.exceptions import S3UploadFailedError
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config as BotoConfig
     from botocore.exceptions import ClientError
     S3_AVAILABLE = True
 except ImportError:
@@ -25,6 +37,50 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+S3_UPLOAD_WORKERS = 8
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+S3_MAX_POOL_CONNECTIONS = 50
+S3_MAX_ATTEMPTS = 3
+REMOTE_STORE_WORKERS = 4
+HEALTH_CACHE_TTL = 5.0  # seconds
+# SHAP/JSON explanations compress several-fold; level 6 is zlib's default trade-off
+S3_GZIP_LEVEL = 6
+
+# openat() lets the files of one KYC submission be created relative to a
+# single open directory handle (not available on Windows)
+_OPENAT_AVAILABLE = os.open in os.supports_dir_fd and hasattr(os, 'O_DIRECTORY')
+
+# Shared by every StorageService so the per-object uploads of one KYC
+# submission run side by side instead of paying one round trip each
+_upload_pool = ThreadPoolExecutor(
+    max_workers=S3_UPLOAD_WORKERS, thread_name_prefix="s3-upload"
+)
+
+
+def _write_file(path, data: bytes, dir_fd: Optional[int] = None) -> None:
+    """
+    Write an already-serialized payload straight to the fd, no io buffer
+    
+    With dir_fd, path is a name relative to that open directory (openat), so
+    several files in one directory don't each re-resolve the full path
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=dir_fd)
+    try:
+        # One write() for regular files; loop only in case it comes back short
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _file_size(path: Path) -> Optional[int]:
+    """Size of an existing file, None if it isn't there"""
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return None
+
 
 class StorageService:
     def __init__(self, storage_type: str = 'local'):
@@ -35,7 +91,7 @@ class StorageService:
             storage_type: 'local', 'ipfs', or 's3'
         """
         self.storage_type = storage_type
-        self.base_path = os.getenv('STORAGE_PATH', 'storage')
+        self.base_path = settings.STORAGE_PATH
         
         # Create storage directories
         self.kyc_path = Path(self.base_path) / 'kyc_documents'
@@ -43,11 +99,26 @@ class StorageService:
         
         self.kyc_path.mkdir(parents=True, exist_ok=True)
         self.explanation_path.mkdir(parents=True, exist_ok=True)
+        # Remote-upload markers for explanations; kept out of explanation_path so
+        # retrieve_explanation can never serve one as an explanation
+        self.explanation_remote_path = self.explanation_path / '.remote'
+        self.explanation_remote_path.mkdir(exist_ok=True)
         
         # Initialize storage backend
         self.ipfs_client = None
         self.s3_client = None
         
+        # Remote copies are pushed in the background once the local write is
+        # done; in-flight uploads are tracked by (kind, hash) until they finish
+        self._remote_executor = ThreadPoolExecutor(
+            max_workers=REMOTE_STORE_WORKERS, thread_name_prefix="storage-remote"
+        )
+        self._remote_uploads: Dict[Tuple[str, str], Future] = {}
+        self._remote_lock = threading.Lock()
+        
+        # (monotonic timestamp, result) of the last check_health probe
+        self._health_cache: Optional[Tuple[float, bool]] = None
+        
         if storage_type == 'ipfs' and IPFS_AVAILABLE:
             self._init_ipfs()
         elif storage_type == 's3' and S3_AVAILABLE:
@@ -58,8 +129,9 @@ class StorageService:
     def _init_ipfs(self):
         """Initialize IPFS client"""
         try:
-            ipfs_addr = os.getenv('IPFS_ADDR', '/ip4/127.0.0.1/tcp/5001')
-            self.ipfs_client = ipfshttpclient.connect(ipfs_addr)
+            # session=True keeps one keep-alive connection pool for the
+            # client's lifetime instead of reconnecting on every add
+            self.ipfs_client = ipfshttpclient.connect(settings.IPFS_ADDR, session=True)
             logger.info("IPFS client connected")
         except Exception as e:
             logger.error(f"IPFS connection failed: {str(e)}")
@@ -71,11 +143,20 @@ class StorageService:
         try:
             self.s3_client = boto3.client(
                 's3',
-                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                region_name=os.getenv('AWS_REGION', 'us-east-1')
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID or None,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or None,
+                region_name=settings.AWS_REGION,
+                config=BotoConfig(
+                    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                    retries={'max_attempts': S3_MAX_ATTEMPTS, 'mode': 'adaptive'}
+                )
             )
-            self.bucket_name = os.getenv('S3_BUCKET_NAME')
+            self.transfer_config = TransferConfig(
+                multipart_threshold=S3_MULTIPART_THRESHOLD,
+                max_concurrency=S3_UPLOAD_WORKERS,
+                use_threads=True
+            )
+            self.bucket_name = settings.S3_BUCKET_NAME
             logger.info(f"S3 client initialized for bucket: {self.bucket_name}")
         except Exception as e:
             logger.error(f"S3 initialization failed: {str(e)}")
@@ -111,44 +192,41 @@ class StorageService:
             selfie_path = kyc_dir / 'selfie.jpg'
             data_path = kyc_dir / 'kyc_data.json'
             
-            with open(id_doc_path, 'wb') as f:
-                f.write(id_document)
-            
-            with open(selfie_path, 'wb') as f:
-                f.write(selfie)
-            
-            with open(data_path, 'w') as f:
-                json.dump(kyc_data, f, indent=2)
+            # Compact, and serialized once: the same bytes are uploaded remotely
+            metadata = orjson.dumps(kyc_data)
+            if _OPENAT_AVAILABLE:
+                dir_fd = os.open(kyc_dir, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    _write_file(id_doc_path.name, id_document, dir_fd)
+                    _write_file(selfie_path.name, selfie, dir_fd)
+                    _write_file(data_path.name, metadata, dir_fd)
+                finally:
+                    os.close(dir_fd)
+            else:
+                _write_file(id_doc_path, id_document)
+                _write_file(selfie_path, selfie)
+                _write_file(data_path, metadata)
             
             logger.info(f"KYC documents stored locally: {kyc_dir}")
             
-            # Store on selected backend
             urls = {
                 'id_document': str(id_doc_path),
                 'selfie': str(selfie_path),
                 'kyc_data': str(data_path)
             }
             
-            if self.storage_type == 'ipfs' and self.ipfs_client:
-                ipfs_result = self._store_on_ipfs(kyc_dir)
-                if ipfs_result:
-                    urls.update(ipfs_result)
-            
-            elif self.storage_type == 's3' and self.s3_client:
-                s3_result = self._store_on_s3(
-                    kyc_hash,
-                    id_document,
-                    selfie,
-                    kyc_data
-                )
-                if s3_result:
-                    urls.update(s3_result)
+            # Store on selected backend without waiting for it
+            remote = self._submit_remote(
+                'kyc', kyc_hash,
+                self._store_kyc_remote, kyc_hash, kyc_dir, id_document, selfie, metadata
+            )
             
             return {
                 'success': True,
                 'storage_type': self.storage_type,
-                'url': urls.get('kyc_data', str(data_path)),
-                'urls': urls
+                'url': str(data_path),
+                'urls': urls,
+                'remote': remote
             }
             
         except Exception as e:
@@ -177,32 +255,30 @@ class StorageService:
             # Save locally
             file_path = self.explanation_path / f"{explanation_hash}.json"
             
-            with open(file_path, 'w') as f:
-                json.dump(explanation_data, f, indent=2)
-            
-            logger.info(f"Explanation stored: {file_path}")
-            
-            url = str(file_path)
-            
-            # Store on selected backend
-            if self.storage_type == 'ipfs' and self.ipfs_client:
-                ipfs_cid = self._add_to_ipfs(json.dumps(explanation_data))
-                if ipfs_cid:
-                    url = f"ipfs://{ipfs_cid}"
-            
-            elif self.storage_type == 's3' and self.s3_client:
-                s3_url = self._upload_to_s3(
-                    f"explanations/{explanation_hash}.json",
-                    json.dumps(explanation_data).encode()
+            # Serialized once; the same bytes go to disk and to the remote copy
+            payload = orjson.dumps(explanation_data)
+            
+            # Explanations are content-addressed: a file of the same size under
+            # this hash already holds these bytes, so rewriting it is wasted work
+            if _file_size(file_path) != len(payload):
+                _write_file(file_path, payload)
+                logger.info(f"Explanation stored: {file_path}")
+            
+            # Store on selected backend without waiting for it, unless a copy
+            # was already uploaded or is on its way
+            remote = self.remote_status('explanation', explanation_hash)
+            if remote is None:
+                remote = self._submit_remote(
+                    'explanation', explanation_hash,
+                    self._store_explanation_remote, explanation_hash, payload
                 )
-                if s3_url:
-                    url = s3_url
             
             return {
                 'success': True,
                 'storage_type': self.storage_type,
-                'url': url,
-                'hash': explanation_hash
+                'url': str(file_path),
+                'hash': explanation_hash,
+                'remote': remote
             }
             
         except Exception as e:
@@ -212,14 +288,125 @@ class StorageService:
                 'error': str(e)
             }
     
+    def _submit_remote(self, kind: str, content_hash: str, fn, *args) -> Optional[str]:
+        """
+        Queue a remote upload on the background pool
+        
+        Returns:
+            'pending' when an upload was queued, None for local-only storage
+        """
+        has_remote = (
+            (self.storage_type == 'ipfs' and self.ipfs_client) or
+            (self.storage_type == 's3' and self.s3_client)
+        )
+        if not has_remote:
+            return None
+        
+        key = (kind, content_hash)
+        future = self._remote_executor.submit(fn, *args)
+        with self._remote_lock:
+            self._remote_uploads[key] = future
+        future.add_done_callback(lambda f: self._remote_done(key, f))
+        return 'pending'
+    
+    def _remote_done(self, key: Tuple[str, str], future: Future) -> None:
+        with self._remote_lock:
+            if self._remote_uploads.get(key) is future:
+                del self._remote_uploads[key]
+        if future.exception() is not None:
+            logger.error(f"Remote {key[0]} upload failed for {key[1]}: {future.exception()}")
+    
+    def _store_kyc_remote(
+        self,
+        kyc_hash: str,
+        kyc_dir: Path,
+        id_document: bytes,
+        selfie: bytes,
+        metadata: bytes
+    ) -> Optional[Dict]:
+        """Copy a KYC submission to the remote backend and record where it went"""
+        if self.storage_type == 'ipfs':
+            result = self._store_on_ipfs(kyc_dir)
+        else:
+            result = self._store_on_s3(kyc_hash, id_document, selfie, metadata)
+        if result:
+            _write_file(kyc_dir / 'remote.json', orjson.dumps(result))
+        return result
+    
+    def _store_explanation_remote(
+        self,
+        explanation_hash: str,
+        payload: bytes
+    ) -> Optional[str]:
+        """Copy a serialized explanation to the remote backend and record its URL"""
+        if self.storage_type == 'ipfs':
+            ipfs_cid = self._add_to_ipfs(payload)
+            url = f"ipfs://{ipfs_cid}" if ipfs_cid else None
+        else:
+            # Stored gzip-encoded under the same key; mtime=0 keeps the object
+            # bytes a pure function of the explanation
+            url = self._upload_to_s3(
+                f"explanations/{explanation_hash}.json",
+                gzip.compress(payload, S3_GZIP_LEVEL, mtime=0),
+                content_encoding='gzip'
+            )
+        if url:
+            _write_file(
+                self.explanation_remote_path / f"{explanation_hash}.json",
+                orjson.dumps({'url': url})
+            )
+        return url
+    
+    def remote_status(self, kind: str, content_hash: str) -> Optional[str]:
+        """
+        Where the remote copy of a stored item stands
+        
+        Args:
+            kind: 'kyc' or 'explanation'
+            content_hash: kyc_hash / explanation_hash it was stored under
+            
+        Returns:
+            'pending' while uploading, 'stored' once the remote location has
+            been recorded, None if there is no remote copy
+        """
+        with self._remote_lock:
+            if (kind, content_hash) in self._remote_uploads:
+                return 'pending'
+        if kind == 'kyc':
+            marker = self.kyc_path / content_hash / 'remote.json'
+        else:
+            marker = self.explanation_remote_path / f"{content_hash}.json"
+        return 'stored' if marker.exists() else None
+    
+    async def store_kyc_documents_async(
+        self,
+        kyc_hash: str,
+        id_document: bytes,
+        selfie: bytes,
+        kyc_data: Dict
+    ) -> Dict:
+        """store_kyc_documents on the default thread pool, off the event loop"""
+        return await asyncio.to_thread(
+            self.store_kyc_documents, kyc_hash, id_document, selfie, kyc_data
+        )
+    
+    async def store_explanation_async(
+        self,
+        explanation_hash: str,
+        explanation_data: Dict
+    ) -> Dict:
+        """store_explanation on the default thread pool, off the event loop"""
+        return await asyncio.to_thread(
+            self.store_explanation, explanation_hash, explanation_data
+        )
+    
     def retrieve_explanation(self, explanation_hash: str) -> Optional[Dict]:
         """Retrieve explanation by hash"""
         try:
             file_path = self.explanation_path / f"{explanation_hash}.json"
             
             if file_path.exists():
-                with open(file_path, 'r') as f:
-                    return json.load(f)
+                return orjson.loads(file_path.read_bytes())
             
             # Try other storage backends if local not found
             if self.storage_type == 's3' and self.s3_client:
@@ -258,10 +445,10 @@ class StorageService:
             logger.error(f"IPFS storage error: {str(e)}")
             return None
     
-    def _add_to_ipfs(self, content: str) -> Optional[str]:
+    def _add_to_ipfs(self, content: bytes) -> Optional[str]:
         """Add content to IPFS"""
         try:
-            result = self.ipfs_client.add_str(content)
+            result = self.ipfs_client.add_bytes(content)
             logger.info(f"Added to IPFS: {result}")
             return result
         except Exception as e:
@@ -273,44 +460,60 @@ class StorageService:
         kyc_hash: str,
         id_document: bytes,
         selfie: bytes,
-        kyc_data: Dict
+        metadata: bytes
     ) -> Optional[Dict]:
-        """Store on S3"""
+        """Store on S3 (metadata is the already-serialized kyc_data.json)"""
         try:
             prefix = f"kyc/{kyc_hash}/"
             
-            # Upload files
-            id_url = self._upload_to_s3(f"{prefix}id_document.jpg", id_document)
-            selfie_url = self._upload_to_s3(f"{prefix}selfie.jpg", selfie)
-            data_url = self._upload_to_s3(
-                f"{prefix}kyc_data.json",
-                json.dumps(kyc_data).encode()
-            )
-            
-            return {
-                'id_document': id_url,
-                'selfie': selfie_url,
-                'kyc_data': data_url
+            # Upload files concurrently
+            uploads = {
+                'id_document': (f"{prefix}id_document.jpg", id_document),
+                'selfie': (f"{prefix}selfie.jpg", selfie),
+                'kyc_data': (f"{prefix}kyc_data.json", metadata),
             }
+            futures = {
+                name: _upload_pool.submit(self._upload_to_s3, key, data)
+                for name, (key, data) in uploads.items()
+            }
+            
+            return {name: future.result() for name, future in futures.items()}
             
         except Exception as e:
             logger.error(f"S3 storage error: {str(e)}")
             return None
     
-    def _upload_to_s3(self, key: str, data: bytes) -> Optional[str]:
-        """Upload data to S3"""
+    def _upload_to_s3(
+        self,
+        key: str,
+        data: bytes,
+        content_encoding: Optional[str] = None
+    ) -> Optional[str]:
+        """Upload data to S3, optionally tagged with a Content-Encoding"""
+        extra = {'ContentEncoding': content_encoding} if content_encoding else {}
         try:
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=key,
-                Body=data
-            )
+            if len(data) >= S3_MULTIPART_THRESHOLD:
+                # Large objects go through the transfer manager (multipart, threaded)
+                self.s3_client.upload_fileobj(
+                    io.BytesIO(data),
+                    self.bucket_name,
+                    key,
+                    ExtraArgs=extra or None,
+                    Config=self.transfer_config
+                )
+            else:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Body=data,
+                    **extra
+                )
             
             url = f"s3://{self.bucket_name}/{key}"
             logger.info(f"Uploaded to S3: {url}")
             return url
             
-        except ClientError as e:
+        except (ClientError, S3UploadFailedError) as e:
             logger.error(f"S3 upload error: {str(e)}")
             return None
     
@@ -323,14 +526,28 @@ class StorageService:
             )
             
             data = response['Body'].read()
-            return json.loads(data.decode())
+            # Objects uploaded before compression was added are plain JSON
+            if response.get('ContentEncoding') == 'gzip':
+                data = gzip.decompress(data)
+            return orjson.loads(data)
             
         except ClientError as e:
             logger.error(f"S3 retrieve error: {str(e)}")
             return None
     
     def check_health(self) -> bool:
-        """Check storage service health"""
+        """Check storage service health, reusing a result younger than HEALTH_CACHE_TTL"""
+        cached = self._health_cache
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < HEALTH_CACHE_TTL:
+            return cached[1]
+        
+        healthy = self._probe_health()
+        self._health_cache = (now, healthy)
+        return healthy
+    
+    def _probe_health(self) -> bool:
+        """Check local storage and the remote backend"""
         try:
             # Check local storage
             if not self.kyc_path.exists() or not self.explanation_path.exists():
@@ -342,7 +559,7 @@ class StorageService:
             
             # Check S3 connection
             if self.storage_type == 's3' and self.s3_client:
-                self.s3_client.list_buckets()
+                self.s3_client.head_bucket(Bucket=self.bucket_name)
             
             return True
             
@@ -0,0 +1,58 @@
+"""
+common.py - Shared request helpers
+"""
+import io
+from typing import Any, BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile
+
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+async def consume_upload(
+    upload: UploadFile,
+    sink: BinaryIO,
+    hasher: Optional[Any] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    max_bytes: Optional[int] = None
+) -> int:
+    """
+    Copy an upload into a sink in fixed-size chunks
+
+    Args:
+        upload: Incoming multipart file
+        sink: Writable binary file-like object (BytesIO, tempfile, ...)
+        hasher: Optional hashlib object updated with every chunk
+        chunk_size: Bytes read per iteration
+        max_bytes: Abort with 413 once more than this many bytes were read
+
+    Returns:
+        Total number of bytes copied
+    """
+    total = 0
+    while chunk := await upload.read(chunk_size):
+        total += len(chunk)
+        if max_bytes is not None and total > max_bytes:
+            raise HTTPException(status_code=413, detail="Upload too large")
+        if hasher is not None:
+            hasher.update(chunk)
+        sink.write(chunk)
+    return total
+
+
+async def read_upload(
+    upload: UploadFile,
+    hasher: Optional[Any] = None,
+    max_bytes: Optional[int] = None
+) -> bytes:
+    """Read an upload in chunks and return its full contents"""
+    buf = io.BytesIO()
+    await consume_upload(upload, buf, hasher, max_bytes=max_bytes)
+    return buf.getvalue()
+
+
+def check_upload_size(upload: UploadFile, max_bytes: int, label: str) -> None:
+    """Reject an upload whose declared size already exceeds the limit"""
+    if (upload.size or 0) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"{label} too large")
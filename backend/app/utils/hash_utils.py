@@ -2,8 +2,58 @@
 hash_utils.py - SHA256 hashing utilities
 """
 import hashlib
+import io
 import json
-from typing import Dict, Any
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Iterable, List
+
+import orjson
+
+
+# Payloads above this are hashed directly: memoizing them would pin
+# up to 1024 large blobs and add a SipHash pass over each for the cache key
+HASH_MEMO_MAX_BYTES = 64 * 1024
+
+# Batches carrying at least this many serialized bytes are hashed on a
+# thread pool; hashlib drops the GIL while digesting buffers over 2 KiB
+PARALLEL_HASH_MIN_BYTES = 1 << 20
+
+
+def canonical_json(data: Dict[str, Any]) -> bytes:
+    """
+    Serialize dictionary to canonical JSON (sorted keys, compact, UTF-8)
+    
+    Payloads orjson refuses (non-str keys, ints beyond 64 bits, NumPy
+    scalars) fall back to the legacy json.dumps form they always hashed as
+    
+    Args:
+        data: Dictionary to serialize
+        
+    Returns:
+        Canonical JSON bytes
+    """
+    try:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    except TypeError:
+        return _legacy_canonical_json(data)
+
+
+def _legacy_canonical_json(data: Dict[str, Any]) -> bytes:
+    """
+    The json.dumps canonical form used before orjson
+    
+    Differs from orjson for non-ASCII text (\\uXXXX escapes), exponent floats
+    (1e-05 / 1e+16 vs 0.00001 / 1e16) and NaN/Infinity (orjson writes null)
+    """
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+@lru_cache(maxsize=1024)
+def _hash_canonical(json_bytes: bytes) -> str:
+    """SHA256 of canonical JSON bytes, memoized for retried payloads"""
+    return '0x' + hashlib.sha256(json_bytes).hexdigest()
 
 
 def generate_hash(data: Dict[str, Any]) -> str:
@@ -17,10 +67,68 @@ def generate_hash(data: Dict[str, Any]) -> str:
         Hex string of SHA256 hash
     """
     # Convert to JSON string with sorted keys for consistency
-    json_str = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    payload = canonical_json(data)
+    if len(payload) > HASH_MEMO_MAX_BYTES:
+        return '0x' + hashlib.sha256(payload).hexdigest()
+    return _hash_canonical(payload)
+
+
+@lru_cache(maxsize=1)
+def _hash_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="hash")
+
+
+def _sha256_hex(payload: bytes) -> str:
+    return '0x' + hashlib.sha256(payload).hexdigest()
+
+
+def generate_hashes(items: Iterable[Dict[str, Any]]) -> List[str]:
+    """
+    Generate SHA256 hashes for many dictionaries at once
+    
+    Same digests as calling generate_hash on each item, without going
+    through its memo; large batches are digested in parallel
+    
+    Args:
+        items: Dictionaries to hash
+        
+    Returns:
+        Hex strings of SHA256 hashes, in input order
+    """
+    payloads = [canonical_json(d) for d in items]
     
-    # Generate SHA256 hash
-    hash_obj = hashlib.sha256(json_str.encode('utf-8'))
+    if len(payloads) > 1 and sum(map(len, payloads)) >= PARALLEL_HASH_MIN_BYTES:
+        return list(_hash_pool().map(_sha256_hex, payloads))
+    
+    sha256 = hashlib.sha256
+    return ['0x' + sha256(p).hexdigest() for p in payloads]
+
+
+def generate_document_hash(stream: BinaryIO, chunk_size: int = 1 << 20) -> str:
+    """
+    Generate SHA256 hash of a binary stream without loading it whole
+    
+    Args:
+        stream: Readable binary file-like object
+        chunk_size: Bytes fed to the hasher per update
+        
+    Returns:
+        Hex string of SHA256 hash
+    """
+    if isinstance(stream, io.BytesIO):
+        # Already in memory: hash the rest of the buffer in place, no copies
+        offset = stream.tell()
+        with stream.getbuffer() as view, view[offset:] as rest:
+            hash_obj = hashlib.sha256(rest)
+        stream.seek(0, io.SEEK_END)
+    elif hasattr(hashlib, 'file_digest') and hasattr(stream, 'readinto'):
+        # Python 3.11+: reads into one reusable buffer (and hashes without
+        # the GIL) instead of allocating a bytes object per chunk
+        hash_obj = hashlib.file_digest(stream, 'sha256')
+    else:
+        hash_obj = hashlib.sha256()
+        while chunk := stream.read(chunk_size):
+            hash_obj.update(chunk)
     
     return '0x' + hash_obj.hexdigest()
 
@@ -36,8 +144,15 @@ def verify_hash(data: Dict[str, Any], expected_hash: str) -> bool:
     Returns:
         True if hash matches, False otherwise
     """
-    computed_hash = generate_hash(data)
-    return computed_hash.lower() == expected_hash.lower()
+    expected_hash = expected_hash.lower()
+    if generate_hash(data).lower() == expected_hash:
+        return True
+    # Hashes anchored before the switch to orjson used the json.dumps form
+    try:
+        legacy = _legacy_canonical_json(data)
+    except (TypeError, ValueError):
+        return False
+    return '0x' + hashlib.sha256(legacy).hexdigest() == expected_hash
 
 
 # ==================== kyc_service.py ====================
@@ -45,10 +160,16 @@ def verify_hash(data: Dict[str, Any], expected_hash: str) -> bool:
 """
 KYC Service for verification logic
 """
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Optional
 import re
-from difflib import SequenceMatcher
+
+from rapidfuzz import fuzz
+
+
+_NAME_CLEAN_RE = re.compile(r'[^\w\s\-]')
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_PHONE_DIGITS_RE = re.compile(r'\D')
 
 
 class KYCService:
@@ -71,16 +192,20 @@ class KYCService:
             return False
         
         try:
-            # Parse date
-            dob = datetime.strptime(date_of_birth, "%Y-%m-%d")
+            # Parse date; zero-padded YYYY-MM-DD goes through the C parser,
+            # anything else (e.g. 1990-5-1) through strptime as before
+            dob = None
+            if len(date_of_birth) == 10 and date_of_birth[4] == date_of_birth[7] == "-":
+                try:
+                    dob = date.fromisoformat(date_of_birth)
+                except ValueError:
+                    pass
+            if dob is None:
+                dob = datetime.strptime(date_of_birth, "%Y-%m-%d").date()
             
-            # Calculate age
-            today = datetime.now()
-            age = today.year - dob.year
-            
-            # Adjust if birthday hasn't occurred this year
-            if today.month < dob.month or (today.month == dob.month and today.day < dob.day):
-                age -= 1
+            # Calculate age, minus one if the birthday hasn't occurred this year
+            today = date.today()
+            age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
             
             return age >= self.min_age
             
@@ -108,16 +233,23 @@ class KYCService:
         form_normalized = self._normalize_name(form_name)
         extracted_normalized = self._normalize_name(extracted_name)
         
-        # Calculate similarity
-        similarity = SequenceMatcher(None, form_normalized, extracted_normalized).ratio()
-        
         # Also check if one name is contained in the other (for middle name differences)
         contained = (
             form_normalized in extracted_normalized or 
             extracted_normalized in form_normalized
         )
+        if contained:
+            return True
         
-        return similarity >= threshold or contained
+        # Similarity is at most 2*min(la, lb) / (la + lb), so names of very
+        # different length can't reach the threshold; skip scoring them
+        la, lb = len(form_normalized), len(extracted_normalized)
+        if 2 * min(la, lb) / (la + lb) < threshold:
+            return False
+        
+        # Calculate similarity
+        cutoff = threshold * 100
+        return fuzz.ratio(form_normalized, extracted_normalized, score_cutoff=cutoff) >= cutoff
     
     def _normalize_name(self, name: str) -> str:
         """Normalize name for comparison"""
@@ -128,7 +260,7 @@ class KYCService:
         normalized = ' '.join(normalized.split())
         
         # Remove special characters except spaces and hyphens
-        normalized = re.sub(r'[^\w\s\-]', '', normalized)
+        normalized = _NAME_CLEAN_RE.sub('', normalized)
         
         return normalized
     
@@ -150,13 +282,12 @@ class KYCService:
     
     def validate_email(self, email: str) -> bool:
         """Validate email format"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return bool(_EMAIL_RE.match(email))
     
     def validate_phone(self, phone: str) -> bool:
         """Validate phone number format"""
         # Remove all non-digit characters
-        digits = re.sub(r'\D', '', phone)
+        digits = _PHONE_DIGITS_RE.sub('', phone)
         
         # Check length (typically 10-15 digits)
         return 10 <= len(digits) <= 15
\ No newline at end of file
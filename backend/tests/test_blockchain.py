@@ -0,0 +1,131 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from app.services import blockchain_service
+
+
+LOAN = dict(
+    principal=1.0,
+    term_days=30,
+    interest_rate=500,
+    kyc_hash="0x" + "a" * 64,
+    explanation_hash="0x" + "b" * 64,
+    risk_category="Low",
+    probability_of_default=100,
+    borrower_address="0x" + "1" * 40,
+)
+
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    """Build BlockchainService on the local ledger under a temp STORAGE_PATH"""
+    local = blockchain_service.settings.model_copy(
+        update={"STORAGE_PATH": tmp_path, "PRIVATE_KEY": "", "CONTRACT_ADDRESS": ""}
+    )
+    monkeypatch.setattr(blockchain_service, "settings", local)
+    return blockchain_service.BlockchainService
+
+
+def test_append_after_torn_journal_tail(make_service, tmp_path):
+    svc = make_service()
+    assert svc.create_loan(**LOAN)["loan_id"] == 1
+
+    # Crash mid-append: a partial entry with no newline
+    with open(tmp_path / "loans.jsonl", "ab") as f:
+        f.write(b'{"id": 2, "op": "crea')
+
+    svc = make_service()
+    assert svc.create_loan(**LOAN)["loan_id"] == 2
+    assert svc.fund_loan(1, 1.0, "0x" + "2" * 40)["success"]
+
+    svc = make_service()
+    assert set(svc._ledger) == {"1", "2"}
+    assert svc._ledger["1"]["status"] == "Funded"
+    assert svc.create_loan(**LOAN)["loan_id"] == 3
+
+
+def test_already_known_tx_is_not_resent(make_service):
+    svc = make_service()
+    svc.w3 = mock.Mock()
+    svc.private_key = "key"
+    svc._nonce = 5
+    signed = mock.Mock(hash=b"\x01" * 32, rawTransaction=b"raw")
+    svc.w3.eth.account.sign_transaction.return_value = signed
+    svc.w3.eth.send_raw_transaction.side_effect = ValueError({"message": "already known"})
+
+    assert svc._send_transaction({}) == signed.hash
+    assert svc.w3.eth.send_raw_transaction.call_count == 1
+    assert svc.w3.eth.account.sign_transaction.call_args[0][0]["nonce"] == 5
+    assert svc._nonce == 6
+
+
+def test_failed_build_or_sign_does_not_leak_a_nonce(make_service):
+    svc = make_service()
+    svc.w3 = mock.Mock()
+    svc.w3.eth.get_transaction_count.return_value = 5
+    svc.private_key = "key"
+    svc.account = mock.Mock(address="0x" + "3" * 40)
+    svc.contract = mock.Mock()
+    svc._tx_params = mock.Mock(return_value={"gas": 300000})
+
+    # build_transaction rejects the call (e.g. value to a non-payable function)
+    svc._fn_fund = mock.Mock()
+    svc._fn_fund.return_value.build_transaction.side_effect = ValueError("non-payable")
+    assert svc.fund_loan(1, 1.0, "0x" + "2" * 40)["success"] is False
+    assert svc._nonce is None
+
+    # Signing fails after the nonce was reserved
+    svc.w3.eth.account.sign_transaction.side_effect = ValueError("bad key")
+    with pytest.raises(ValueError):
+        svc._send_transaction({})
+    assert svc._nonce is None
+
+    svc.w3.eth.account.sign_transaction.side_effect = None
+    svc._send_transaction({})
+    assert svc.w3.eth.account.sign_transaction.call_args[0][0]["nonce"] == 5
+
+
+class _StubEth:
+    """Chain whose head never moves after the tx is mined (automine, one sender)"""
+
+    def __init__(self, receipts):
+        self.block_number = 7
+        self._receipts = receipts
+
+    def get_transaction_receipt(self, tx_hash):
+        try:
+            return self._receipts[tx_hash]
+        except KeyError:
+            raise blockchain_service.TransactionNotFound(tx_hash) from None
+
+
+def test_receipt_watcher_checks_tx_mined_into_seen_head():
+    first, second = b"\x01" * 32, b"\x02" * 32
+    w3 = mock.Mock(eth=_StubEth({first: {"status": 1}}))
+    watcher = blockchain_service._ReceiptWatcher(w3, poll_interval=0.01)
+
+    # A second sender is already waiting, so the watcher has seen head 7
+    # before `first` is registered
+    waiter = threading.Thread(target=lambda: _swallow(watcher.wait, second, 1.0))
+    waiter.start()
+    time.sleep(0.05)
+
+    assert watcher.wait(first, timeout=1.0) == {"status": 1}
+    waiter.join()
+
+
+def test_receipt_timeout_has_explicit_error():
+    w3 = mock.Mock(eth=_StubEth({}))
+    watcher = blockchain_service._ReceiptWatcher(w3, poll_interval=0.01)
+    with pytest.raises(TimeoutError, match="receipt_timeout"):
+        watcher.wait(b"\x03" * 32, timeout=0.05)
+
+
+def _swallow(fn, *args):
+    try:
+        fn(*args)
+    except TimeoutError:
+        pass
@@ -0,0 +1,31 @@
+import hashlib
+import json
+
+import pytest
+
+from app.utils.hash_utils import generate_hash, generate_hashes, verify_hash
+
+
+def legacy_hash(data):
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return "0x" + hashlib.sha256(payload).hexdigest()
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"score": 1e-05},
+        {"name": "José"},
+        {"ratio": float("nan")},
+        {1: 2},
+        {"amount": 2**70},
+    ],
+)
+def test_legacy_anchored_hashes_still_verify(data):
+    assert verify_hash(data, legacy_hash(data))
+    assert verify_hash(data, generate_hash(data))
+    assert generate_hashes([data]) == [generate_hash(data)]
+
+
+def test_verify_hash_rejects_mismatch():
+    assert not verify_hash({"a": 1}, legacy_hash({"a": 2}))
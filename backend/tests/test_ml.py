@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.services.ml_service import MLService
+
+
+FEATURES = {
+    "income": 50000,
+    "employment_length": 3,
+    "debt_to_income": 0.2,
+    "credit_inquiries": 1,
+    "loan_amount": 0.5,
+    "loan_term": 30,
+}
+
+
+def test_mock_predict_division_by_zero_fails():
+    svc = MLService()
+    svc.model = None
+    result = svc.predict({**FEATURES, "income": -1})
+    assert result["success"] is False
+    assert svc.predict(FEATURES)["success"] is True
+
+
+class _ConstantModel:
+    def __init__(self, p):
+        self.p = p
+
+    def predict_proba(self, x):
+        return np.array([[1 - self.p, self.p]])
+
+
+class _IdentityScaler:
+    def transform(self, x):
+        return x
+
+
+def test_swapped_model_does_not_reuse_cached_scores():
+    svc = MLService()
+    svc.scaler = _IdentityScaler()
+    svc.model = _ConstantModel(0.1)
+    assert svc.predict(FEATURES)["prediction"] == 0.1
+
+    svc.model = _ConstantModel(0.9)
+    assert svc.predict(FEATURES)["prediction"] == 0.9
+
+    # Caches are per instance
+    assert MLService()._predict_cached is not svc._predict_cached